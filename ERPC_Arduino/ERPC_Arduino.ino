@@ -20,6 +20,9 @@
  * Date: December 24, 2024
  */
 
+#include <util/atomic.h>
+#include <util/crc16.h>
+
 // ============================================================================
 // CONFIGURATION
 // ============================================================================
@@ -29,6 +32,20 @@ const float ALPHA = 0.3;        // Salience weight
 const float BETA = 0.5;         // Gradient weight
 const float THRESHOLD = 0.5;    // Entropy threshold (Volts)
 
+// Uncomment to run the GEP pipeline in Q8.8 fixed point instead of
+// soft float (see calculateGEPFixed for the cycle budget)
+// #define ERPC_FIXED_POINT
+
+// Uncomment to count Timer1 PWM periods and emitted gate pulses (adds
+// Periods/Pulses to the Summary line). The overflow ISR runs every 10us
+// and costs ~50 cycles each time, about 30% of the CPU, so it is off in
+// production builds
+// #define ERPC_PULSE_COUNT
+
+// Uncomment to timestamp each phase of the control step with TCNT2 and
+// keep a histogram of step durations ('t' prints them)
+// #define ERPC_TIMING
+
 // Hardware Configuration
 const int PIN_VOUT = A0;        // Voltage sensing
 const int PIN_ILOAD = A1;       // Current sensing
@@ -39,16 +56,70 @@ const int PIN_LED = 13;         // Status indicator
 const float VREF = 5.0;         // Arduino Vref
 const int ADC_MAX = 1023;       // 10-bit ADC
 
+// Free-running ADC, alternating PIN_VOUT/PIN_ILOAD (see ADC_vect)
+// Conversion = 13 ADC clocks; one Vout/Iload pair = 26 ADC clocks:
+//   128 -> 208us/pair (analogRead default)   32 -> 52us/pair (default)
+//    64 -> 104us/pair                        16 -> 26us/pair (~9-bit accuracy)
+const uint8_t ADC_PRESCALER = 32;  // 2, 4, 8, 16, 32, 64 or 128
+
 // Voltage divider ratios (adjust for your circuit)
 const float VOUT_SCALE = 2.4;   // If using 10k/10k divider for 12V → 5V
 const float ISENSE_SCALE = 1.0; // Amps per volt (depends on sense resistor)
 
 // Timing
 const int SAMPLE_RATE_HZ = 10000;  // 10kHz sampling (100us period)
+const int TIMER2_PRESCALER = 8;    // Timer2 tick = 0.5us at 16MHz
 const int PWM_FREQ_HZ = 100000;    // 100kHz PWM base frequency
 
-// Moving average filter
-const int FILTER_SIZE = 4;
+#ifdef ERPC_TIMING
+// Step durations in Timer2 ticks map to bins 0..14 as ticks * scale >> 8
+// (one multiply, no divide); the last bin counts overruns
+const uint8_t TIMING_BINS = 16;
+const uint16_t STEP_TICKS = F_CPU / TIMER2_PRESCALER / SAMPLE_RATE_HZ;
+const uint8_t TIMING_BIN_SCALE = (TIMING_BINS - 1) * 256UL / STEP_TICKS;
+#endif
+
+// Moving average filter on the raw Vout/Iload counts ('f' toggles it)
+const uint8_t FILTER_SHIFT = 2;
+const int FILTER_SIZE = 1 << FILTER_SHIFT;  // Power of two: divide = shift
+
+// Exact switching counters, summed every step and printed as one
+// "Summary:" line per window (see updateSummary)
+const unsigned long SUMMARY_INTERVAL_MS = 1000;
+#ifdef ERPC_PULSE_COUNT
+const uint8_t SUMMARY_FIELDS = 11;
+#else
+const uint8_t SUMMARY_FIELDS = 9;
+#endif
+const uint8_t PSUM_SHIFT = 4;            // Psum = sum(Vout x Iload counts) >> 4
+
+// Burst capture ('c' command): every control step recorded into SRAM,
+// then dumped as one binary block (see BurstHeader). Sized for the 2KB of
+// the ATmega328P: ~860 bytes of globals with this buffer and ~190 for the
+// core and Serial buffers leave ~1KB of stack for loop() and the nested
+// Timer2/ADC/UART interrupts. Text goes out through F()/PSTR() only, so
+// string literals stay in flash ('s' reports the free RAM left)
+const uint16_t BURST_SAMPLES = 128;     // 3 bytes each: 384 bytes, 12.8ms at 10kHz
+const uint16_t BURST_SYNC = 0x5BA5;     // Sent as A5 5B
+
+// Triggered event capture ('a' command) in the same buffer: keeps the
+// last TRIGGER_PRE steps and, once A(t) or |∇S(t)| crosses its level,
+// TRIGGER_POST more from the triggering step on
+const uint16_t EVENT_SYNC = 0x5CA5;     // Sent as A5 5C
+const uint16_t TRIGGER_PRE = 32;
+const uint16_t TRIGGER_POST = 96;
+static_assert(TRIGGER_PRE + TRIGGER_POST <= BURST_SAMPLES, "event window must fit the burst buffer");
+const float TRIGGER_SALIENCE = 0.5;     // A(t) level (W per step)
+const float TRIGGER_GRADIENT = 0.25;    // |∇S(t)| level (V per step)
+
+// Binary telemetry ('b' command)
+// One TelemetryFrame per control step instead of a text line every 100ms
+const uint16_t FRAME_SYNC = 0x5AA5;  // Sent as A5 5A (little-endian)
+
+// Output queues: records waiting to be formatted and sent by loop()
+const uint8_t DEBUG_QUEUE_SIZE = 4;  // Power of two
+const uint8_t FRAME_QUEUE_SIZE = 8;  // Power of two
+const uint8_t DEBUG_FIELDS = 10;     // Fields per debug line
 
 // ============================================================================
 // GLOBAL VARIABLES
@@ -62,6 +133,25 @@ float iload_amps = 0;
 float vout_prev = 0;
 float iload_prev = 0;
 
+// Raw ADC counts (sent in binary frames; host rebuilds the GEP terms)
+int vout_raw = 0;
+int vout_prev_raw = 0;
+int iload_raw = 0;
+
+// ADC results, double-buffered: the ISR fills adc_results[write bank]
+// and publishes it as adc_ready_bank once both channels are in
+volatile uint16_t adc_results[2][2];   // [bank][0 = Vout, 1 = Iload]
+volatile uint8_t adc_ready_bank = 0;
+volatile unsigned long adc_pairs = 0;  // Completed Vout/Iload pairs
+uint8_t adc_write_bank = 0;
+uint8_t adc_converting = 0;            // Input of the conversion in progress
+
+// Moving average: last FILTER_SIZE counts per channel and their sum
+uint16_t filter_samples[2][FILTER_SIZE];  // [0 = Vout, 1 = Iload]
+uint16_t filter_sum[2];
+uint8_t filter_index = 0;
+volatile bool filter_enabled = true;
+
 // GEP components
 float error_signal = 0;         // E(t)
 float salience_signal = 0;      // A(t)
@@ -69,17 +159,185 @@ float gradient_signal = 0;      // |∇S(t)|
 float correction_term = 0;      // [1 + α·A - β·|∇S|]
 float entropy_field = 0;        // ΔS(t)
 
+#ifdef ERPC_FIXED_POINT
+// Q8.8 fixed point: value = q / 256 (1 LSB = 3.9mV / 3.9mA)
+const int16_t Q8_ONE = 256;
+const int16_t VOUT_Q16 = VREF * VOUT_SCALE / ADC_MAX * 65536 + 0.5;   // Q8.8 per count << 8
+const int16_t ISENSE_Q16 = VREF * ISENSE_SCALE / ADC_MAX * 65536 + 0.5;
+const int16_t VREF_TARGET_Q8 = 5.0 * Q8_ONE;
+const int16_t ALPHA_Q8 = ALPHA * Q8_ONE + 0.5;
+const int16_t BETA_Q8 = BETA * Q8_ONE + 0.5;
+const int32_t THRESHOLD_Q8 = THRESHOLD * Q8_ONE + 0.5;
+
+int16_t vout_q = 0;
+int16_t vout_prev_q = 0;
+int16_t iload_q = 0;
+int16_t error_q = 0;            // E(t)
+int16_t salience_q = 0;         // A(t)
+int16_t gradient_q = 0;         // |∇S(t)|
+int16_t correction_q = 0;       // [1 + α·A - β·|∇S|]
+int32_t entropy_q = 0;          // ΔS(t), can exceed Q8.8 int16 range
+#endif
+
 // Gate control
 bool gate_enabled = false;
 int pwm_duty = 0;               // 0-255 for analogWrite
 
-// Timing
-unsigned long last_sample_us = 0;
-unsigned long sample_count = 0;
+// Timing (written by the Timer2 ISR; copy with interrupts off in loop())
+volatile unsigned long sample_count = 0;
+volatile unsigned long overrun_count = 0;  // Periods skipped by a late step
+volatile uint8_t latency_min = 255;        // ISR entry latency, Timer2 ticks
+volatile uint8_t latency_max = 0;
+
+#ifdef ERPC_TIMING
+// Control step phases, timed in Timer2 ticks from the compare match
+enum TimingPhase {
+  PHASE_ADC,         // Sensor copy, filter and scaling
+  PHASE_GEP,         // calculateGEP
+  PHASE_GATE,        // updateGate
+  PHASE_TELEMETRY,   // Counters, burst recorder and output queues
+  TIMING_PHASES
+};
+
+uint8_t phase_mark = 0;          // TCNT2 at the end of the last phase
+unsigned long phase_sum[TIMING_PHASES];
+uint8_t phase_max[TIMING_PHASES];
+unsigned long step_histogram[TIMING_BINS];
+#endif
+
+#ifdef ERPC_PULSE_COUNT
+// Timer1 periods and periods with a pulse (OCR1A > 0). The overflow ISR
+// only bumps these free-running 8-bit ticks; each control step folds
+// the increments since the last step into the 32-bit totals
+volatile uint8_t pwm_period_ticks = 0;
+volatile uint8_t pwm_pulse_ticks = 0;
+uint8_t pwm_period_seen = 0;
+uint8_t pwm_pulse_seen = 0;
+volatile unsigned long pwm_periods = 0;
+volatile unsigned long pwm_pulses = 0;
+#endif
 
 // Debug
-bool debug_enabled = true;
+volatile bool debug_enabled = true;
 unsigned long last_debug_ms = 0;
+volatile bool binary_enabled = false;
+
+// Snapshot of one debug line, taken on the control path and printed later
+struct DebugRecord {
+  unsigned long sample;
+  float vout;
+  float iload;
+  float error;
+  float salience;
+  float gradient;
+  float correction;
+  float entropy;
+  bool gate;
+  uint8_t pwm;
+};
+
+DebugRecord debug_queue[DEBUG_QUEUE_SIZE];
+volatile uint8_t debug_head = 0; // Free-running; slot = index & (SIZE - 1)
+volatile uint8_t debug_tail = 0;
+uint8_t debug_field = 0;         // Next field of the tail record
+char field_text[32];             // Formatted field waiting for TX space
+uint8_t field_len = 0;           // 0 = next field not formatted yet
+volatile unsigned long dropped_records = 0;
+
+// Per-window counters; the ISR accumulates into summary and hands a
+// finished window to loop() as summary_out
+struct SummaryCounters {
+  unsigned long steps;
+  unsigned long transitions;     // Gate ON<->OFF changes
+  unsigned long gate_on;         // Steps with the gate enabled
+  uint16_t vmin;                 // Vout counts
+  uint16_t vmax;
+  unsigned long vsum;            // Sum of Vout counts
+  unsigned long psum;            // Sum of Vout x Iload counts >> PSUM_SHIFT
+  unsigned long ms;              // Window length; overrun steps stretch it
+#ifdef ERPC_PULSE_COUNT
+  unsigned long pwm_periods;     // Timer1 periods (fixed-frequency pulses)
+  unsigned long pwm_pulses;      // Periods that emitted a gate pulse
+#endif
+};
+
+SummaryCounters summary;
+SummaryCounters summary_out;
+volatile bool summary_ready = false;
+bool summary_sending = false;
+uint8_t summary_field = 0;
+bool summary_gate = false;       // Gate state of the previous step
+unsigned long last_summary_ms = 0;
+
+// Binary telemetry frame: 14 bytes, little-endian fields
+struct __attribute__((packed)) TelemetryFrame {
+  uint16_t sync;           // FRAME_SYNC
+  uint32_t sample;         // sample_count
+  uint16_t vout_raw;       // ADC counts, this step
+  uint16_t vout_prev_raw;  // ADC counts, previous step
+  uint16_t iload_raw;      // ADC counts, bit 15 = gate enabled
+  uint8_t pwm;             // pwm_duty
+  uint8_t crc;             // CRC-8 (poly 0x07) over sample..pwm
+};
+
+// Burst block header, followed by count 3-byte entries and a CRC-16
+// (XMODEM, little-endian) over everything after the sync word
+struct __attribute__((packed)) BurstHeader {
+  uint16_t sync;           // BURST_SYNC
+  uint32_t first_sample;   // sample_count of the first entry
+  uint16_t count;          // Entries, one per consecutive control step
+  uint16_t period_us;      // Control period
+  uint8_t flags;           // Bit 0 = filter on, bit 1 = fixed point,
+                           // bit 2/3 = event triggered by A(t)/|∇S(t)|
+  uint16_t trigger;        // Entry index of the trigger (0xFFFF: none)
+};
+
+enum BurstState {
+  BURST_IDLE,
+  BURST_RECORDING,   // Plain burst: fill the buffer
+  BURST_ARMED,       // Event: keep the last TRIGGER_PRE steps in a ring
+  BURST_TRIGGERED,   // Event: record the TRIGGER_POST steps
+  BURST_FULL,
+  BURST_SENDING
+};
+
+uint8_t burst_buffer[BURST_SAMPLES * 3];
+volatile uint8_t burst_state = BURST_IDLE;
+uint16_t burst_count = 0;        // Entries held
+uint16_t burst_write = 0;        // Next ring slot
+uint16_t burst_post_left = 0;
+uint16_t burst_trigger = 0xFFFF;
+uint8_t burst_trigger_flags = 0;
+unsigned long burst_first_sample = 0;
+bool trigger_enabled = false;    // Re-arm after each event ('a')
+BurstHeader burst_header;
+uint16_t burst_start_byte = 0;   // Buffer offset of the oldest entry
+uint16_t burst_sent = 0;         // Bytes of the block written so far
+uint16_t burst_crc = 0;
+
+TelemetryFrame frame_queue[FRAME_QUEUE_SIZE];
+volatile uint8_t frame_head = 0;
+volatile uint8_t frame_tail = 0;
+
+// CRC-8 lookup (poly 0x07, init 0): one table read per byte
+const uint8_t CRC8_TABLE[256] PROGMEM = {
+  0x00, 0x07, 0x0E, 0x09, 0x1C, 0x1B, 0x12, 0x15, 0x38, 0x3F, 0x36, 0x31, 0x24, 0x23, 0x2A, 0x2D,
+  0x70, 0x77, 0x7E, 0x79, 0x6C, 0x6B, 0x62, 0x65, 0x48, 0x4F, 0x46, 0x41, 0x54, 0x53, 0x5A, 0x5D,
+  0xE0, 0xE7, 0xEE, 0xE9, 0xFC, 0xFB, 0xF2, 0xF5, 0xD8, 0xDF, 0xD6, 0xD1, 0xC4, 0xC3, 0xCA, 0xCD,
+  0x90, 0x97, 0x9E, 0x99, 0x8C, 0x8B, 0x82, 0x85, 0xA8, 0xAF, 0xA6, 0xA1, 0xB4, 0xB3, 0xBA, 0xBD,
+  0xC7, 0xC0, 0xC9, 0xCE, 0xDB, 0xDC, 0xD5, 0xD2, 0xFF, 0xF8, 0xF1, 0xF6, 0xE3, 0xE4, 0xED, 0xEA,
+  0xB7, 0xB0, 0xB9, 0xBE, 0xAB, 0xAC, 0xA5, 0xA2, 0x8F, 0x88, 0x81, 0x86, 0x93, 0x94, 0x9D, 0x9A,
+  0x27, 0x20, 0x29, 0x2E, 0x3B, 0x3C, 0x35, 0x32, 0x1F, 0x18, 0x11, 0x16, 0x03, 0x04, 0x0D, 0x0A,
+  0x57, 0x50, 0x59, 0x5E, 0x4B, 0x4C, 0x45, 0x42, 0x6F, 0x68, 0x61, 0x66, 0x73, 0x74, 0x7D, 0x7A,
+  0x89, 0x8E, 0x87, 0x80, 0x95, 0x92, 0x9B, 0x9C, 0xB1, 0xB6, 0xBF, 0xB8, 0xAD, 0xAA, 0xA3, 0xA4,
+  0xF9, 0xFE, 0xF7, 0xF0, 0xE5, 0xE2, 0xEB, 0xEC, 0xC1, 0xC6, 0xCF, 0xC8, 0xDD, 0xDA, 0xD3, 0xD4,
+  0x69, 0x6E, 0x67, 0x60, 0x75, 0x72, 0x7B, 0x7C, 0x51, 0x56, 0x5F, 0x58, 0x4D, 0x4A, 0x43, 0x44,
+  0x19, 0x1E, 0x17, 0x10, 0x05, 0x02, 0x0B, 0x0C, 0x21, 0x26, 0x2F, 0x28, 0x3D, 0x3A, 0x33, 0x34,
+  0x4E, 0x49, 0x40, 0x47, 0x52, 0x55, 0x5C, 0x5B, 0x76, 0x71, 0x78, 0x7F, 0x6A, 0x6D, 0x64, 0x63,
+  0x3E, 0x39, 0x30, 0x37, 0x22, 0x25, 0x2C, 0x2B, 0x06, 0x01, 0x08, 0x0F, 0x1A, 0x1D, 0x14, 0x13,
+  0xAE, 0xA9, 0xA0, 0xA7, 0xB2, 0xB5, 0xBC, 0xBB, 0x96, 0x91, 0x98, 0x9F, 0x8A, 0x8D, 0x84, 0x83,
+  0xDE, 0xD9, 0xD0, 0xD7, 0xC2, 0xC5, 0xCC, 0xCB, 0xE6, 0xE1, 0xE8, 0xEF, 0xFA, 0xFD, 0xF4, 0xF3
+};
 
 // ============================================================================
 // SETUP
@@ -88,10 +346,10 @@ unsigned long last_debug_ms = 0;
 void setup() {
   // Serial for debugging
   Serial.begin(115200);
-  Serial.println("========================================");
-  Serial.println("ERPC - Entropy-Regulated Power Control");
-  Serial.println("GEP Algorithm Active");
-  Serial.println("========================================");
+  Serial.println(F("========================================"));
+  Serial.println(F("ERPC - Entropy-Regulated Power Control"));
+  Serial.println(F("GEP Algorithm Active"));
+  Serial.println(F("========================================"));
   
   // Pin configuration
   pinMode(PIN_LED, OUTPUT);
@@ -106,22 +364,58 @@ void setup() {
   ICR1 = 159;  // TOP value for 100kHz (16MHz/100kHz - 1)
   OCR1A = 0;   // Start with 0% duty cycle
   
-  // Initial ADC read
+  // Start the free-running ADC and wait for the first pair
+  startADC();
+  while (adc_pairs == 0) {
+  }
+  readSensors();
+  primeFilter();
   vout_volts = readVout();
   iload_amps = readIload();
   vout_prev = vout_volts;
   iload_prev = iload_amps;
+  vout_prev_raw = vout_raw;
+#ifdef ERPC_FIXED_POINT
+  vout_prev_q = countsToQ8(vout_raw, VOUT_Q16);
+#endif
   
-  Serial.println("Initialization complete.");
-  Serial.println("GEP Parameters:");
-  Serial.print("  Alpha (salience): "); Serial.println(ALPHA, 3);
-  Serial.print("  Beta (gradient): "); Serial.println(BETA, 3);
-  Serial.print("  Threshold: "); Serial.print(THRESHOLD, 3); Serial.println("V");
-  Serial.println("Ready.");
+  Serial.println(F("Initialization complete."));
+  printParameters();
+  Serial.println(F("Ready."));
   Serial.println();
   
   delay(100);
-  last_sample_us = micros();
+  resetSummary();
+  last_summary_ms = millis();
+  
+#ifdef ERPC_PULSE_COUNT
+  // Count Timer1 periods from here on
+  TIFR1 = _BV(TOV1);
+  TIMSK1 = _BV(TOIE1);
+#endif
+  
+  // Configure Timer2 to schedule the control step
+  // CTC mode, compare interrupt every SAMPLE_RATE_HZ period
+  // For 10kHz: prescaler=8, OCR2A=199 (16MHz / 8 / 10kHz - 1)
+  TCCR2A = _BV(WGM21);
+  TCCR2B = _BV(CS21);
+  OCR2A = F_CPU / TIMER2_PRESCALER / SAMPLE_RATE_HZ - 1;
+  TCNT2 = 0;
+  TIFR2 = _BV(OCF2A);
+  TIMSK2 = _BV(OCIE2A);
+}
+
+void printParameters() {
+  // Reprinted whenever a setting changes; the analysis script starts a new
+  // session at each block, so runs with different settings stay separate
+  Serial.println(F("GEP Parameters:"));
+  Serial.print(F("  Alpha (salience): ")); Serial.println(ALPHA, 3);
+  Serial.print(F("  Beta (gradient): ")); Serial.println(BETA, 3);
+  Serial.print(F("  Threshold: ")); Serial.print(THRESHOLD, 3); Serial.println(F("V"));
+  Serial.print(F("  Filter (samples): ")); Serial.println(filter_enabled ? FILTER_SIZE : 1);
+#ifdef ERPC_FIXED_POINT
+  Serial.println(F("  Arithmetic: Q8.8 fixed point"));
+#endif
 }
 
 // ============================================================================
@@ -129,46 +423,198 @@ void setup() {
 // ============================================================================
 
 void loop() {
-  unsigned long now_us = micros();
+  // Communications only; the control step runs from the Timer2 ISR.
+  // At most one debug field or frame per pass, never blocking. A full
+  // burst goes out first, as soon as no text line is half sent.
+  if (burst_state == BURST_SENDING || (burst_state == BURST_FULL && debug_field == 0 && !summary_sending)) {
+    serviceBurst();
+  } else if (summary_sending || (summary_ready && debug_field == 0 && field_len == 0)) {
+    serviceSummary();
+  } else if (binary_enabled) {
+    serviceFrames();
+  } else {
+    serviceDebug();
+  }
+}
+
+// ============================================================================
+// CONTROL SCHEDULER
+// ============================================================================
+
+ISR(TIMER2_COMPA_vect) {
+  // TCNT2 restarts at the compare match, so it holds the entry latency
+  uint8_t latency = TCNT2;
   
-  // Check if it's time for next sample
-  if (now_us - last_sample_us >= (1000000 / SAMPLE_RATE_HZ)) {
-    last_sample_us = now_us;
-    
-    // Read sensors
-    vout_volts = readVout();
-    iload_amps = readIload();
-    
-    // Calculate GEP components
-    calculateGEP();
-    
-    // Update gate control
-    updateGate();
-    
-    // Increment counter
-    sample_count++;
-    
-    // Debug output every 100ms
-    if (debug_enabled && (millis() - last_debug_ms >= 100)) {
-      printDebug();
-      last_debug_ms = millis();
-    }
+  // Keep millis() and the UART interrupts running during the step,
+  // but never re-enter it
+  TIMSK2 &= ~_BV(OCIE2A);
+#ifdef ERPC_TIMING
+  phase_mark = latency;
+#endif
+  sei();
+  
+  controlStep();
+  
+  cli();
+  bool overran = TIFR2 & _BV(OCF2A);
+  if (overran) {
+    // The next period started before this step finished: skip it
+    // instead of running late, so steps stay on the timer grid
+    TIFR2 = _BV(OCF2A);
+    overrun_count++;
+  }
+#ifdef ERPC_TIMING
+  recordStepTime(overran);
+#endif
+  TIMSK2 |= _BV(OCIE2A);
+  
+  if (latency < latency_min) latency_min = latency;
+  if (latency > latency_max) latency_max = latency;
+}
+
+void controlStep() {
+  // Read sensors (latest ADC pair, no waiting) and smooth them
+  vout_prev_raw = vout_raw;
+  readSensors();
+  filterSensors();
+#ifdef ERPC_FIXED_POINT
+  vout_q = countsToQ8(vout_raw, VOUT_Q16);
+  iload_q = countsToQ8(iload_raw, ISENSE_Q16);
+#else
+  vout_volts = readVout();
+  iload_amps = readIload();
+#endif
+#ifdef ERPC_TIMING
+  markPhase(PHASE_ADC);
+#endif
+  
+  // Calculate GEP components
+#ifdef ERPC_FIXED_POINT
+  calculateGEPFixed();
+#else
+  calculateGEP();
+#endif
+#ifdef ERPC_TIMING
+  markPhase(PHASE_GEP);
+#endif
+  
+  // Update gate control
+  updateGate();
+#ifdef ERPC_PULSE_COUNT
+  foldPulseCounts();
+#endif
+#ifdef ERPC_TIMING
+  markPhase(PHASE_GATE);
+#endif
+  
+  // Increment counters
+  sample_count++;
+  updateSummary();
+  
+  if (burst_state >= BURST_RECORDING && burst_state <= BURST_TRIGGERED) {
+    recordBurst();
+  }
+  
+  // Binary frame every step, or debug text every 100ms
+  if (binary_enabled) {
+    queueFrame();
+  } else if (debug_enabled && (millis() - last_debug_ms >= 100)) {
+    queueDebug();
+    last_debug_ms = millis();
   }
+#ifdef ERPC_TIMING
+  markPhase(PHASE_TELEMETRY);
+#endif
 }
 
 // ============================================================================
 // SENSOR READING
 // ============================================================================
 
+// analogRead() blocks for a whole conversion (~112us at the default
+// prescaler), so two reads alone exceed the 100us control period. The ADC
+// instead converts continuously in free-running mode and ADC_vect stores
+// each result; the control step just copies the latest complete pair.
+
+uint8_t adcPrescalerBits(uint8_t prescaler) {
+  uint8_t bits = 1;  // ADPS 1 = divide by 2
+  while ((2 << bits) <= prescaler && bits < 7) {
+    bits++;
+  }
+  return bits;
+}
+
+void startADC() {
+  // Digital input buffers off on the analog pins; AVcc reference, first
+  // conversion on Vout
+  DIDR0 |= _BV(PIN_VOUT - A0) | _BV(PIN_ILOAD - A0);
+  ADMUX = _BV(REFS0) | (PIN_VOUT - A0);
+  ADCSRB = 0;  // Auto trigger source: free running
+  adc_converting = 0;
+  ADCSRA = _BV(ADEN) | _BV(ADATE) | _BV(ADIE) | _BV(ADSC) | adcPrescalerBits(ADC_PRESCALER);
+}
+
+ISR(ADC_vect) {
+  uint16_t value = ADC;
+  
+  // In free-running mode the next conversion starts as this one ends, on
+  // the input ADMUX held then. So this result is for adc_converting, the
+  // one now running is for ADMUX, and a new ADMUX applies to the one after.
+  uint8_t channel = adc_converting;
+  adc_converting = (ADMUX & 0x0F) == (PIN_VOUT - A0) ? 0 : 1;
+  ADMUX = _BV(REFS0) | (adc_converting ? PIN_VOUT - A0 : PIN_ILOAD - A0);
+  
+  adc_results[adc_write_bank][channel] = value;
+  if (channel == 1) {
+    adc_ready_bank = adc_write_bank;
+    adc_write_bank ^= 1;
+    adc_pairs++;
+  }
+}
+
+void readSensors() {
+  ATOMIC_BLOCK(ATOMIC_RESTORESTATE) {
+    vout_raw = adc_results[adc_ready_bank][0];
+    iload_raw = adc_results[adc_ready_bank][1];
+  }
+}
+
+// Running-sum moving average: each sample replaces the oldest one in the
+// window and the sum is adjusted by the difference, so the cost is the
+// same for any FILTER_SIZE (sums stay exact in uint16 up to 64 samples).
+// The window keeps filling while the filter is off, so 'f' takes effect
+// on the next step.
+
+void primeFilter() {
+  for (uint8_t i = 0; i < FILTER_SIZE; i++) {
+    filter_samples[0][i] = vout_raw;
+    filter_samples[1][i] = iload_raw;
+  }
+  filter_sum[0] = vout_raw << FILTER_SHIFT;
+  filter_sum[1] = iload_raw << FILTER_SHIFT;
+}
+
+void filterSensors() {
+  uint8_t i = filter_index;
+  filter_sum[0] += vout_raw - filter_samples[0][i];
+  filter_sum[1] += iload_raw - filter_samples[1][i];
+  filter_samples[0][i] = vout_raw;
+  filter_samples[1][i] = iload_raw;
+  filter_index = (i + 1) & (FILTER_SIZE - 1);
+  
+  if (filter_enabled) {
+    vout_raw = filter_sum[0] >> FILTER_SHIFT;
+    iload_raw = filter_sum[1] >> FILTER_SHIFT;
+  }
+}
+
 float readVout() {
-  int raw = analogRead(PIN_VOUT);
-  float voltage = (raw / (float)ADC_MAX) * VREF;
+  float voltage = (vout_raw / (float)ADC_MAX) * VREF;
   return voltage * VOUT_SCALE;  // Scale to actual voltage
 }
 
 float readIload() {
-  int raw = analogRead(PIN_ILOAD);
-  float voltage = (raw / (float)ADC_MAX) * VREF;
+  float voltage = (iload_raw / (float)ADC_MAX) * VREF;
   return voltage * ISENSE_SCALE;  // Convert to amps
 }
 
@@ -207,18 +653,75 @@ void calculateGEP() {
   iload_prev = iload_amps;
 }
 
+#ifdef ERPC_FIXED_POINT
+// Same pipeline in Q8.8 integers. Every product is a 16x16->32 multiply
+// (the AVR's MUL instruction) followed by a byte shift; the only rounding
+// is the scale constants (VOUT 769/65536 V/count: +0.03%, ISENSE 320:
+// -0.1%) and alpha = 77/256 (0.3008).
+//
+// Worst-case cycles per step at 16MHz, float path from the avr-libc
+// soft-float routines (mul ~150, add/sub ~120, div ~490, int->float ~75),
+// fixed path counted by instruction:
+//
+//                         float        fixed
+//   counts -> Vout/Iload  ~1,630       ~40   (2 x div, 4 x mul vs 2 x MUL)
+//   E, A, |∇S|            ~  650       ~35
+//   correction, ΔS        ~  700       ~50
+//   threshold compare     ~  140       ~10
+//   total                 ~3,100 (~195us)   ~135 (~8.5us)
+//
+// The float path alone exceeds the 100us period at 10kHz; the fixed path
+// leaves the step dominated by updateGate() and the telemetry queues.
+
+int16_t countsToQ8(uint16_t counts, int16_t scale_q16) {
+  return ((int32_t)counts * scale_q16) >> 8;
+}
+
+void calculateGEPFixed() {
+  // 1. ERROR SIGNAL E(t)
+  error_q = VREF_TARGET_Q8 - vout_q;
+  
+  // 2. SALIENCE SIGNAL A(t) = |V·I - V_prev·I| = |(V - V_prev)·I|
+  int16_t dv = vout_q - vout_prev_q;
+  int32_t power_delta = ((int32_t)dv * iload_q) >> 8;
+  salience_q = power_delta < 0 ? -power_delta : power_delta;
+  
+  // 3. GRADIENT SIGNAL |∇S(t)|
+  gradient_q = dv < 0 ? -dv : dv;
+  
+  // 4. CORRECTION TERM [1 + α·A(t) - β·|∇S(t)|]
+  correction_q = Q8_ONE
+               + (int16_t)(((int32_t)ALPHA_Q8 * salience_q) >> 8)
+               - (int16_t)(((int32_t)BETA_Q8 * gradient_q) >> 8);
+  
+  // 5. ENTROPY FIELD ΔS(t) = E(t) × correction_term
+  entropy_q = ((int32_t)error_q * correction_q) >> 8;
+  
+  // Store current reading for next iteration
+  vout_prev_q = vout_q;
+}
+#endif
+
 // ============================================================================
 // GATE CONTROL
 // ============================================================================
 
 void updateGate() {
   // Compare entropy field to threshold
-  if (entropy_field > THRESHOLD) {
+#ifdef ERPC_FIXED_POINT
+  int32_t field = entropy_q;
+  const int32_t threshold = THRESHOLD_Q8;
+#else
+  float field = entropy_field;
+  const float threshold = THRESHOLD;
+#endif
+  
+  if (field > threshold) {
     // High entropy → Enable switching
     gate_enabled = true;
     pwm_duty = 128;  // 50% duty cycle (adjust as needed)
     digitalWrite(PIN_LED, HIGH);
-  } else if (entropy_field < -THRESHOLD) {
+  } else if (field < -threshold) {
     // Negative entropy (undershoot) → Also enable
     gate_enabled = true;
     pwm_duty = 128;
@@ -239,21 +742,499 @@ void updateGate() {
   }
 }
 
+#ifdef ERPC_PULSE_COUNT
+ISR(TIMER1_OVF_vect) {
+  // TOV1 is set at TOP and OCR1A is latched at the BOTTOM right after,
+  // so the duty read here is that of the period just starting
+  pwm_period_ticks++;
+  if (OCR1A) {
+    pwm_pulse_ticks++;
+  }
+}
+
+void foldPulseCounts() {
+  // Ticks wrap after 25 control steps; byte reads need no interrupt lock,
+  // and an overflow between the two reads is picked up next step
+  uint8_t periods = pwm_period_ticks;
+  uint8_t pulses = pwm_pulse_ticks;
+  uint8_t new_periods = periods - pwm_period_seen;
+  uint8_t new_pulses = pulses - pwm_pulse_seen;
+  pwm_period_seen = periods;
+  pwm_pulse_seen = pulses;
+  
+  pwm_periods += new_periods;
+  pwm_pulses += new_pulses;
+  summary.pwm_periods += new_periods;
+  summary.pwm_pulses += new_pulses;
+}
+#endif
+
 // ============================================================================
 // DEBUG OUTPUT
 // ============================================================================
 
-void printDebug() {
-  Serial.print("Samples: "); Serial.print(sample_count);
-  Serial.print(" | Vout: "); Serial.print(vout_volts, 3);
-  Serial.print("V | Iload: "); Serial.print(iload_amps, 3);
-  Serial.print("A | E: "); Serial.print(error_signal, 4);
-  Serial.print(" | A: "); Serial.print(salience_signal, 4);
-  Serial.print(" | ∇S: "); Serial.print(gradient_signal, 4);
-  Serial.print(" | Corr: "); Serial.print(correction_term, 4);
-  Serial.print(" | ΔS: "); Serial.print(entropy_field, 4);
-  Serial.print(" | Gate: "); Serial.print(gate_enabled ? "ON " : "OFF");
-  Serial.print(" | PWM: "); Serial.println(pwm_duty);
+// Printing a whole line with Serial.print blocks once the 64-byte TX
+// buffer fills. Instead the control step only copies the values into
+// debug_queue (or counts a drop when it is full), and loop() formats and
+// sends one field at a time when the TX buffer has room for it.
+
+void queueDebug() {
+  if ((uint8_t)(debug_head - debug_tail) >= DEBUG_QUEUE_SIZE) {
+    dropped_records++;
+    return;
+  }
+  
+  DebugRecord &rec = debug_queue[debug_head & (DEBUG_QUEUE_SIZE - 1)];
+  rec.sample = sample_count;
+#ifdef ERPC_FIXED_POINT
+  // Converted only for the 10 lines/s that get printed
+  const float Q8_SCALE = 1.0 / Q8_ONE;
+  rec.vout = vout_q * Q8_SCALE;
+  rec.iload = iload_q * Q8_SCALE;
+  rec.error = error_q * Q8_SCALE;
+  rec.salience = salience_q * Q8_SCALE;
+  rec.gradient = gradient_q * Q8_SCALE;
+  rec.correction = correction_q * Q8_SCALE;
+  rec.entropy = entropy_q * Q8_SCALE;
+#else
+  rec.vout = vout_volts;
+  rec.iload = iload_amps;
+  rec.error = error_signal;
+  rec.salience = salience_signal;
+  rec.gradient = gradient_signal;
+  rec.correction = correction_term;
+  rec.entropy = entropy_field;
+#endif
+  rec.gate = gate_enabled;
+  rec.pwm = pwm_duty;
+  asm volatile("" ::: "memory");  // Publish the record before the index
+  debug_head++;
+}
+
+// Labels are PSTR() strings in flash, copied straight into the field
+void appendFloat(char *out, PGM_P label, float value, uint8_t digits) {
+  strcpy_P(out, label);
+  dtostrf(value, 1, digits, out + strlen(out));
+}
+
+uint8_t formatField(uint8_t index, uint8_t field, char *out) {
+  const DebugRecord &rec = debug_queue[index & (DEBUG_QUEUE_SIZE - 1)];
+  
+  switch (field) {
+    case 0: strcpy_P(out, PSTR("Samples: ")); ultoa(rec.sample, out + strlen(out), 10); break;
+    case 1: appendFloat(out, PSTR(" | Vout: "), rec.vout, 3); strcat_P(out, PSTR("V")); break;
+    case 2: appendFloat(out, PSTR(" | Iload: "), rec.iload, 3); strcat_P(out, PSTR("A")); break;
+    case 3: appendFloat(out, PSTR(" | E: "), rec.error, 4); break;
+    case 4: appendFloat(out, PSTR(" | A: "), rec.salience, 4); break;
+    case 5: appendFloat(out, PSTR(" | ∇S: "), rec.gradient, 4); break;
+    case 6: appendFloat(out, PSTR(" | Corr: "), rec.correction, 4); break;
+    case 7: appendFloat(out, PSTR(" | ΔS: "), rec.entropy, 4); break;
+    case 8: strcpy_P(out, PSTR(" | Gate: ")); strcat_P(out, rec.gate ? PSTR("ON ") : PSTR("OFF")); break;
+    default: strcpy_P(out, PSTR(" | PWM: ")); itoa(rec.pwm, out + strlen(out), 10); strcat_P(out, PSTR("\r\n")); break;
+  }
+  return strlen(out);
+}
+
+void serviceDebug() {
+  if (debug_tail == debug_head) {
+    return;
+  }
+  
+  // Format once, then wait (without blocking) until the field fits
+  if (field_len == 0) {
+    field_len = formatField(debug_tail, debug_field, field_text);
+  }
+  if (Serial.availableForWrite() < field_len) {
+    return;
+  }
+  
+  Serial.write((const uint8_t *)field_text, field_len);
+  field_len = 0;
+  if (++debug_field == DEBUG_FIELDS) {
+    debug_field = 0;
+    debug_tail++;
+  }
+}
+
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  while (len--) {
+    crc = pgm_read_byte(&CRC8_TABLE[crc ^ *data++]);
+  }
+  return crc;
+}
+
+void queueFrame() {
+  // The link carries ~800 frames/s; steps finding the queue full are skipped
+  if ((uint8_t)(frame_head - frame_tail) >= FRAME_QUEUE_SIZE) {
+    return;
+  }
+  
+  TelemetryFrame &frame = frame_queue[frame_head & (FRAME_QUEUE_SIZE - 1)];
+  frame.sync = FRAME_SYNC;
+  frame.sample = sample_count;
+  frame.vout_raw = vout_raw;
+  frame.vout_prev_raw = vout_prev_raw;
+  frame.iload_raw = iload_raw | (gate_enabled ? 0x8000 : 0);
+  frame.pwm = pwm_duty;
+  asm volatile("" ::: "memory");
+  frame_head++;
+}
+
+void serviceFrames() {
+  if (frame_tail == frame_head ||
+      Serial.availableForWrite() < (int)sizeof(TelemetryFrame)) {
+    return;
+  }
+  
+  TelemetryFrame &frame = frame_queue[frame_tail & (FRAME_QUEUE_SIZE - 1)];
+  frame.crc = crc8((const uint8_t *)&frame + 2, sizeof(frame) - 3);
+  Serial.write((const uint8_t *)&frame, sizeof(frame));
+  frame_tail++;
+}
+
+void printStatus() {
+  noInterrupts();
+  unsigned long steps = sample_count;
+  unsigned long overruns = overrun_count;
+  unsigned long dropped = dropped_records;
+  unsigned long pairs = adc_pairs;
+  uint8_t lat_min = latency_min;
+  uint8_t lat_max = latency_max;
+#ifdef ERPC_PULSE_COUNT
+  unsigned long periods = pwm_periods;
+  unsigned long pulses = pwm_pulses;
+#endif
+  interrupts();
+  
+  // Latency is in Timer2 ticks; jitter is the spread of the entry latency
+  const float US_PER_TICK = TIMER2_PRESCALER * 1000000.0 / F_CPU;
+  Serial.print(F("Status: Steps: ")); Serial.print(steps);
+  Serial.print(F(" | Overruns: ")); Serial.print(overruns);
+  Serial.print(F(" | Latency: ")); Serial.print(lat_min * US_PER_TICK, 1);
+  Serial.print(F("-")); Serial.print(lat_max * US_PER_TICK, 1);
+  Serial.print(F("us | Jitter: ")); Serial.print((lat_max - lat_min) * US_PER_TICK, 1);
+  Serial.print(F("us | ADC pairs: ")); Serial.print(pairs);
+#ifdef ERPC_PULSE_COUNT
+  Serial.print(F(" | PWM pulses: ")); Serial.print(pulses);
+  Serial.print(F("/")); Serial.print(periods);
+#endif
+  Serial.print(F(" | Dropped records: ")); Serial.print(dropped);
+  Serial.print(F(" | Free RAM: ")); Serial.println(freeRam());
+}
+
+int freeRam() {
+  // Gap between the top of the heap (or of .bss, with no heap in use) and
+  // the stack pointer; the nested ISRs run in this space
+  extern char __heap_start;
+  extern char *__brkval;
+  char top;
+  return &top - (__brkval ? __brkval : &__heap_start);
+}
+
+// ============================================================================
+// SUMMARY COUNTERS
+// ============================================================================
+
+// Debug lines and frames are samples; these counters see every step, so
+// the host gets exact switching totals for one short line per second.
+
+void resetSummary() {
+  summary.steps = 0;
+  summary.transitions = 0;
+  summary.gate_on = 0;
+  summary.vmin = 0xFFFF;
+  summary.vmax = 0;
+  summary.vsum = 0;
+  summary.psum = 0;
+#ifdef ERPC_PULSE_COUNT
+  summary.pwm_periods = 0;
+  summary.pwm_pulses = 0;
+#endif
+}
+
+void updateSummary() {
+  summary.steps++;
+  if (gate_enabled != summary_gate) {
+    summary.transitions++;
+    summary_gate = gate_enabled;
+  }
+  if (gate_enabled) {
+    summary.gate_on++;
+  }
+  if ((uint16_t)vout_raw < summary.vmin) summary.vmin = vout_raw;
+  if ((uint16_t)vout_raw > summary.vmax) summary.vmax = vout_raw;
+  summary.vsum += vout_raw;
+  summary.psum += ((uint32_t)vout_raw * iload_raw) >> PSUM_SHIFT;
+  
+  // While the previous window is still being printed this one keeps
+  // growing, so every step lands in exactly one printed window
+  unsigned long now = millis();
+  if (!summary_ready && now - last_summary_ms >= SUMMARY_INTERVAL_MS) {
+    summary_out = summary;
+    summary_out.ms = now - last_summary_ms;
+    resetSummary();
+    last_summary_ms = now;
+    summary_ready = true;
+  }
+}
+
+uint8_t formatSummaryField(uint8_t field, char *out) {
+  PGM_P label;
+  unsigned long value;
+  switch (field) {
+    case 0: label = PSTR("Summary: Steps: "); value = summary_out.steps; break;
+    case 1: label = PSTR(" | Transitions: "); value = summary_out.transitions; break;
+    case 2: label = PSTR(" | Gate ON: "); value = summary_out.gate_on; break;
+    case 3: label = PSTR(" | Gate OFF: "); value = summary_out.steps - summary_out.gate_on; break;
+    case 4: label = PSTR(" | Vmin: "); value = summary_out.vmin; break;
+    case 5: label = PSTR(" | Vmax: "); value = summary_out.vmax; break;
+    case 6: label = PSTR(" | Vsum: "); value = summary_out.vsum; break;
+    case 7: label = PSTR(" | Psum: "); value = summary_out.psum; break;
+#ifdef ERPC_PULSE_COUNT
+    case 8: label = PSTR(" | Ms: "); value = summary_out.ms; break;
+    case 9: label = PSTR(" | Periods: "); value = summary_out.pwm_periods; break;
+    default: label = PSTR(" | Pulses: "); value = summary_out.pwm_pulses; break;
+#else
+    default: label = PSTR(" | Ms: "); value = summary_out.ms; break;
+#endif
+  }
+  strcpy_P(out, label);
+  ultoa(value, out + strlen(out), 10);
+  if (field == SUMMARY_FIELDS - 1) {
+    strcat_P(out, PSTR("\r\n"));
+  }
+  return strlen(out);
+}
+
+void serviceSummary() {
+  // Same field-at-a-time path as debug lines, sharing field_text
+  summary_sending = true;
+  if (field_len == 0) {
+    field_len = formatSummaryField(summary_field, field_text);
+  }
+  if (Serial.availableForWrite() < field_len) {
+    return;
+  }
+  
+  Serial.write((const uint8_t *)field_text, field_len);
+  field_len = 0;
+  if (++summary_field == SUMMARY_FIELDS) {
+    summary_field = 0;
+    summary_sending = false;
+    summary_ready = false;
+  }
+}
+
+// ============================================================================
+// TIMING INSTRUMENTATION
+// ============================================================================
+
+// Proof that the step fits its period: each phase is timed from TCNT2,
+// which restarts at every compare match, so the value at the end of the
+// step is its whole duration including the ISR entry latency. A step
+// that overran has a wrapped TCNT2 and only lands in the overrun bin.
+
+#ifdef ERPC_TIMING
+void markPhase(uint8_t phase) {
+  uint8_t now = TCNT2;
+  uint8_t ticks = now - phase_mark;
+  phase_mark = now;
+  phase_sum[phase] += ticks;
+  if (ticks > phase_max[phase]) phase_max[phase] = ticks;
+}
+
+void recordStepTime(bool overran) {
+  uint8_t bin = overran ? TIMING_BINS - 1 : ((uint16_t)TCNT2 * TIMING_BIN_SCALE) >> 8;
+  step_histogram[bin]++;
+}
+
+void resetTiming() {
+  for (uint8_t i = 0; i < TIMING_PHASES; i++) {
+    phase_sum[i] = 0;
+    phase_max[i] = 0;
+  }
+  for (uint8_t i = 0; i < TIMING_BINS; i++) {
+    step_histogram[i] = 0;
+  }
+}
+#endif
+
+void printTiming() {
+#ifdef ERPC_TIMING
+  static const char PHASE_ADC[] PROGMEM = "ADC";
+  static const char PHASE_GEP[] PROGMEM = "GEP";
+  static const char PHASE_GATE[] PROGMEM = "Gate";
+  static const char PHASE_TELEMETRY[] PROGMEM = "Telemetry";
+  static const char *const PHASE_NAMES[TIMING_PHASES] PROGMEM = {
+    PHASE_ADC, PHASE_GEP, PHASE_GATE, PHASE_TELEMETRY
+  };
+  const float US_PER_TICK = TIMER2_PRESCALER * 1000000.0 / F_CPU;
+  
+  // Copied one value at a time so interrupts are never held off for long
+  unsigned long histogram[TIMING_BINS];
+  unsigned long steps = 0;
+  for (uint8_t i = 0; i < TIMING_BINS; i++) {
+    ATOMIC_BLOCK(ATOMIC_RESTORESTATE) {
+      histogram[i] = step_histogram[i];
+    }
+    steps += histogram[i];
+  }
+  unsigned long overruns;
+  ATOMIC_BLOCK(ATOMIC_RESTORESTATE) {
+    overruns = overrun_count;
+  }
+  
+  Serial.print(F("Timing: Steps: ")); Serial.print(steps);
+  Serial.print(F(" | Overruns: ")); Serial.print(overruns);
+  Serial.print(F(" | Period: ")); Serial.print(STEP_TICKS * US_PER_TICK, 1);
+  Serial.print(F("us | Bin: ")); Serial.print(256.0 / TIMING_BIN_SCALE * US_PER_TICK, 2);
+  Serial.println(F("us"));
+  
+  for (uint8_t i = 0; i < TIMING_PHASES; i++) {
+    unsigned long sum;
+    uint8_t longest;
+    ATOMIC_BLOCK(ATOMIC_RESTORESTATE) {
+      sum = phase_sum[i];
+      longest = phase_max[i];
+    }
+    Serial.print(F("Phase ")); Serial.print((const __FlashStringHelper *)pgm_read_ptr(&PHASE_NAMES[i]));
+    Serial.print(F(": Mean: ")); Serial.print(steps ? sum * US_PER_TICK / steps : 0.0, 2);
+    Serial.print(F("us | Max: ")); Serial.print(longest * US_PER_TICK, 1);
+    Serial.println(F("us"));
+  }
+  
+  Serial.print(F("Histogram:"));
+  for (uint8_t i = 0; i < TIMING_BINS; i++) {
+    Serial.print(F(" ")); Serial.print(histogram[i]);
+  }
+  Serial.println();
+#else
+  Serial.println(F("Timing: not built (define ERPC_TIMING)"));
+#endif
+}
+
+// ============================================================================
+// BURST CAPTURE
+// ============================================================================
+
+// Debug lines sample 1 step in 1000, so gate transitions between them are
+// invisible. A burst records BURST_SAMPLES consecutive steps instead, as
+// packed counts (24 bits, little-endian: Vout bits 0-9, Iload bits 10-19,
+// gate bit 20), and loop() dumps the block once it is full. An armed event
+// capture writes the same entries into the buffer as a ring, so the steps
+// leading up to a transient are already there when it triggers.
+
+void startCapture(uint8_t state) {
+  burst_count = 0;
+  burst_write = 0;
+  burst_trigger = 0xFFFF;
+  burst_trigger_flags = 0;
+  asm volatile("" ::: "memory");
+  burst_state = state;
+}
+
+uint8_t transientFlags() {
+#ifdef ERPC_FIXED_POINT
+  const int16_t SALIENCE_Q8 = TRIGGER_SALIENCE * Q8_ONE;
+  const int16_t GRADIENT_Q8 = TRIGGER_GRADIENT * Q8_ONE;
+  return (salience_q > SALIENCE_Q8 ? 0x04 : 0) | (gradient_q > GRADIENT_Q8 ? 0x08 : 0);
+#else
+  return (salience_signal > TRIGGER_SALIENCE ? 0x04 : 0) | (gradient_signal > TRIGGER_GRADIENT ? 0x08 : 0);
+#endif
+}
+
+void recordBurst() {
+  uint8_t *entry = &burst_buffer[burst_write * 3];
+  entry[0] = vout_raw;
+  entry[1] = ((vout_raw >> 8) & 0x03) | (iload_raw << 2);
+  entry[2] = ((iload_raw >> 6) & 0x0F) | (gate_enabled ? 0x10 : 0);
+  if (++burst_write == BURST_SAMPLES) {
+    burst_write = 0;
+  }
+  
+  bool full;
+  if (burst_state == BURST_ARMED) {
+    if (burst_count <= TRIGGER_PRE) {
+      burst_count++;  // Up to TRIGGER_PRE steps plus the current one
+    }
+    uint8_t flags = transientFlags();
+    if (flags) {
+      // This step is the trigger; it is the first of the post samples
+      burst_trigger = burst_count - 1;
+      burst_trigger_flags = flags;
+      burst_post_left = TRIGGER_POST - 1;
+      burst_state = BURST_TRIGGERED;
+    }
+    full = false;
+  } else if (burst_state == BURST_TRIGGERED) {
+    burst_count++;
+    full = --burst_post_left == 0;
+  } else {
+    full = ++burst_count == BURST_SAMPLES;
+  }
+  
+  if (full) {
+    burst_first_sample = sample_count - burst_count + 1;
+    burst_state = BURST_FULL;
+  }
+}
+
+uint8_t burstByte(uint16_t pos, uint16_t payload_end) {
+  uint8_t value;
+  if (pos < sizeof(BurstHeader)) {
+    value = ((const uint8_t *)&burst_header)[pos];
+  } else if (pos < payload_end) {
+    // Entries oldest first, wrapping around the ring
+    uint16_t i = burst_start_byte + (pos - sizeof(BurstHeader));
+    if (i >= sizeof(burst_buffer)) {
+      i -= sizeof(burst_buffer);
+    }
+    value = burst_buffer[i];
+  } else {
+    return pos == payload_end ? burst_crc & 0xFF : burst_crc >> 8;
+  }
+  
+  if (pos >= sizeof(burst_header.sync)) {
+    burst_crc = _crc_xmodem_update(burst_crc, value);
+  }
+  return value;
+}
+
+void serviceBurst() {
+  if (burst_state == BURST_FULL) {
+    bool event = burst_trigger != 0xFFFF;
+    burst_header.sync = event ? EVENT_SYNC : BURST_SYNC;
+    burst_header.first_sample = burst_first_sample;
+    burst_header.count = burst_count;
+    burst_header.period_us = 1000000L / SAMPLE_RATE_HZ;
+    burst_header.flags = (filter_enabled ? 0x01 : 0) | burst_trigger_flags;
+#ifdef ERPC_FIXED_POINT
+    burst_header.flags |= 0x02;
+#endif
+    burst_header.trigger = burst_trigger;
+    uint16_t start = burst_write + BURST_SAMPLES - burst_count;
+    burst_start_byte = (start >= BURST_SAMPLES ? start - BURST_SAMPLES : start) * 3;
+    burst_sent = 0;
+    burst_crc = 0;
+    burst_state = BURST_SENDING;
+  }
+  
+  // Only what fits in the TX buffer right now
+  uint16_t payload_end = sizeof(BurstHeader) + burst_count * 3;
+  int room = Serial.availableForWrite();
+  while (room-- > 0 && burst_sent < payload_end + 2) {
+    Serial.write(burstByte(burst_sent, payload_end));
+    burst_sent++;
+  }
+  
+  if (burst_sent == payload_end + 2) {
+    if (trigger_enabled) {
+      startCapture(BURST_ARMED);
+    } else {
+      burst_state = BURST_IDLE;
+    }
+  }
 }
 
 // ============================================================================
@@ -261,26 +1242,103 @@ void printDebug() {
 // ============================================================================
 
 void serialEvent() {
+  // Replies would split a half-sent line or burst; wait for its end
+  if (debug_field != 0 || summary_sending || burst_state == BURST_SENDING) {
+    return;
+  }
+  
   while (Serial.available()) {
     char cmd = Serial.read();
     
     switch(cmd) {
       case 'd':  // Toggle debug
         debug_enabled = !debug_enabled;
-        Serial.print("Debug: ");
-        Serial.println(debug_enabled ? "ON" : "OFF");
+        Serial.print(F("Debug: "));
+        Serial.println(debug_enabled ? F("ON") : F("OFF"));
+        break;
+        
+      case 'b':  // Toggle binary telemetry
+        binary_enabled = !binary_enabled;
+        debug_tail = debug_head;  // Discard queued lines and frames
+        frame_tail = frame_head;
+        debug_field = 0;          // and a field formatted but not yet sent
+        field_len = 0;
+        Serial.print(F("Binary telemetry: "));
+        Serial.println(binary_enabled ? F("ON") : F("OFF"));
+        break;
+        
+      case 'c':  // Capture a full-rate burst
+        if (burst_state == BURST_IDLE || burst_state == BURST_ARMED) {
+          startCapture(BURST_RECORDING);
+          Serial.print(F("Burst: recording "));
+          Serial.print(BURST_SAMPLES);
+          Serial.println(F(" samples"));
+        } else {
+          Serial.println(F("Burst: busy"));
+        }
+        break;
+        
+      case 'a':  // Toggle triggered event capture
+        trigger_enabled = !trigger_enabled;
+        if (trigger_enabled && burst_state == BURST_IDLE) {
+          startCapture(BURST_ARMED);
+        } else if (!trigger_enabled && burst_state == BURST_ARMED) {
+          burst_state = BURST_IDLE;
+        }
+        Serial.print(F("Trigger: "));
+        if (trigger_enabled) {
+          Serial.print(F("ON (A > ")); Serial.print(TRIGGER_SALIENCE, 3);
+          Serial.print(F(" or ∇S > ")); Serial.print(TRIGGER_GRADIENT, 3);
+          Serial.println(F(")"));
+        } else {
+          Serial.println(F("OFF"));
+        }
+        break;
+        
+      case 'f':  // Toggle moving-average filter
+        filter_enabled = !filter_enabled;
+        printParameters();
         break;
         
       case 'r':  // Reset counters
+        noInterrupts();
         sample_count = 0;
-        Serial.println("Counters reset.");
+        dropped_records = 0;
+        overrun_count = 0;
+        latency_min = 255;
+        latency_max = 0;
+#ifdef ERPC_PULSE_COUNT
+        pwm_periods = 0;
+        pwm_pulses = 0;
+#endif
+#ifdef ERPC_TIMING
+        resetTiming();
+#endif
+        resetSummary();
+        last_summary_ms = millis();
+        interrupts();
+        Serial.println(F("Counters reset."));
+        break;
+        
+      case 's':  // Status counters
+        printStatus();
+        break;
+        
+      case 't':  // Control step timing
+        printTiming();
         break;
         
       case '?':  // Help
-        Serial.println("Commands:");
-        Serial.println("  d - Toggle debug output");
-        Serial.println("  r - Reset counters");
-        Serial.println("  ? - This help");
+        Serial.println(F("Commands:"));
+        Serial.println(F("  d - Toggle debug output"));
+        Serial.println(F("  b - Toggle binary telemetry frames"));
+        Serial.println(F("  f - Toggle moving-average filter"));
+        Serial.println(F("  c - Capture a full-rate burst"));
+        Serial.println(F("  a - Toggle triggered event capture"));
+        Serial.println(F("  r - Reset counters"));
+        Serial.println(F("  s - Show status counters"));
+        Serial.println(F("  t - Show control step timing"));
+        Serial.println(F("  ? - This help"));
         break;
     }
   }
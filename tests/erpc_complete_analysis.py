@@ -7,6 +7,7 @@ Date: December 2024
 
 Usage:
     python3 erpc_complete_analysis.py erpc_log.txt
+    python3 erpc_complete_analysis.py tests/ "captures/**/*.txt" --summary nightly.csv
 
 This script analyzes ERPC performance data and calculates:
 - Switching reduction percentage
@@ -15,202 +16,1997 @@ This script analyzes ERPC performance data and calculates:
 - Performance visualizations
 """
 
+import argparse
+import bz2
+import contextlib
+import csv
+import glob
+import gzip
+import hashlib
+import io
+import lzma
+import mmap
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections.abc import Mapping
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RECORD_PATTERN = re.compile(
+    r'Samples: (\d+) \| Vout: ([\d.]+)V \| Iload: ([\d.]+)A \| E: ([-\d.]+) \| A: ([\d.]+) \| ∇S: ([\d.]+) \| Corr: ([\d.]+) \| ΔS: ([-\d.]+) \| Gate: (\w+)\s+\| PWM: (\d+)'
+)
+
+# Same pattern over raw UTF-8 bytes, so files can be matched without decoding
+RECORD_PATTERN_BYTES = re.compile(RECORD_PATTERN.pattern.encode('utf-8'))
+
+# Column name and storage type for each RECORD_PATTERN group, in group order
+COLUMN_DTYPES = {
+    'samples': np.int64,
+    'vout': np.float32,
+    'iload': np.float32,
+    'entropy': np.float32,       # E(t)
+    'salience': np.float32,      # A(t)
+    'gradient': np.float32,      # |∇S(t)|
+    'correction': np.float32,    # Corr
+    'delta_s': np.float32,       # ΔS(t)
+    'gate': np.uint8,
+    'pwm': np.uint8
+}
+
+RECORD_KEYS = tuple(COLUMN_DTYPES)
+
+# Session number of each record (see SessionTracker), added by the ingest pass
+SESSION_DTYPE = np.uint16
+
+def empty_columns():
+    """Return a zero-length column set with the parser's dtypes"""
+    
+    columns = {key: np.empty(0, dtype=dtype) for key, dtype in COLUMN_DTYPES.items()}
+    columns['session'] = np.empty(0, dtype=SESSION_DTYPE)
+    return columns
+
+def concatenate_columns(batches):
+    """Join column batches end to end into one contiguous column set"""
+    
+    batches = list(batches)
+    if not batches:
+        return empty_columns()
+    return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+def _columns_from_groups(groups, session=0):
+    """
+    Convert a list of RECORD_PATTERN(_BYTES) group tuples into typed columns.
+
+    session is either one session number for every record or a sequence
+    with one number per record.
+    """
+    
+    if not groups:
+        return empty_columns()
+    
+    text = np.array(groups)
+    gate_on = b'ON' if text.dtype.kind == 'S' else 'ON'
+    columns = {}
+    for i, (key, dtype) in enumerate(COLUMN_DTYPES.items()):
+        if key == 'gate':
+            columns[key] = (text[:, i] == gate_on).astype(dtype)
+        else:
+            columns[key] = text[:, i].astype(dtype)
+    
+    columns['session'] = np.broadcast_to(np.asarray(session, dtype=SESSION_DTYPE), len(text)).copy()
+    return columns
+
+# Firmware startup banner, printed on every reset
+SESSION_BANNER = 'ERPC - Entropy-Regulated Power Control'
+
+# Header of the parameter block printed after the banner
+PARAMETER_HEADER = 'GEP Parameters:'
+
+# Session parameter name -> pattern for its line in the parameter block
+PARAMETER_PATTERNS = {
+    'alpha': re.compile(r'Alpha \(salience\):\s*([-\d.]+)'),
+    'beta': re.compile(r'Beta \(gradient\):\s*([-\d.]+)'),
+    'threshold': re.compile(r'Threshold:\s*([-\d.]+)V'),
+    'filter': re.compile(r'Filter \(samples\):\s*(\d+)')     # 1 = unfiltered
+}
+
+class SessionTracker:
+    """
+    Line-by-line session segmentation.
+
+    A session starts at every firmware banner, and also at a parameter
+    block printed after the current session already has records (settings
+    changed without a reset). Records seen before any header form an
+    implicit session with unknown (NaN) parameters. Feed each non-record
+    line to header_line() and call record() for each record line.
+    """
+    
+    def __init__(self):
+        self.sessions = []
+        self.current = -1
+        self._has_records = False
+    
+    def _start(self, offset=None):
+        self.current += 1
+        self._has_records = False
+        session = {'session': self.current, 'offset': offset}
+        session.update({name: np.nan for name in PARAMETER_PATTERNS})
+        self.sessions.append(session)
+    
+    def header_line(self, line, offset=None):
+        """Update the session state from one non-record line"""
+        
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        
+        if SESSION_BANNER in line:
+            self._start(offset)
+        elif PARAMETER_HEADER in line:
+            if self.current < 0 or self._has_records:
+                self._start(offset)
+        elif self.current >= 0 and not self._has_records:
+            for name, pattern in PARAMETER_PATTERNS.items():
+                match = pattern.search(line)
+                if match:
+                    self.sessions[-1][name] = float(match.group(1))
+    
+    def record(self):
+        """Return the session number for the next record line"""
+        
+        if self.current < 0:
+            self._start(0)
+        self._has_records = True
+        return self.current
+
+def _iter_groups(lines):
+    """Yield the regex groups of every record line; lines may be str or bytes"""
+    
+    search = None
+    for line in lines:
+        if search is None:
+            search = (RECORD_PATTERN_BYTES if isinstance(line, bytes) else RECORD_PATTERN).search
+        match = search(line)
+        if match is not None:
+            yield match.groups()
+
+def iter_erpc_records(lines):
+    """
+    Yield one record tuple per ERPC log line, in RECORD_KEYS order.
+
+    Accepts any iterable of str or bytes lines (an open file, a socket
+    reader, a list), so only the current line is ever held in memory.
+    """
+    
+    for groups in _iter_groups(lines):
+        yield (
+            int(groups[0]),
+            *(float(value) for value in groups[1:8]),
+            1 if groups[8] in ('ON', b'ON') else 0,
+            int(groups[9])
+        )
+
+def iter_erpc_batches(lines, batch_size=65536, tracker=None):
+    """
+    Yield column batches of at most batch_size records.
+
+    Each batch has the same layout as parse_erpc_log() output, so analysis
+    can start on the first batch before the rest of the file is read.
+    Session headers are fed to tracker (a SessionTracker, kept across
+    calls by callers that resume a stream), which numbers the records.
+    """
+    
+    if tracker is None:
+        tracker = SessionTracker()
+    
+    search = None
+    groups = []
+    sessions = []
+    
+    for line in lines:
+        if search is None:
+            search = (RECORD_PATTERN_BYTES if isinstance(line, bytes) else RECORD_PATTERN).search
+        match = search(line)
+        if match is None:
+            tracker.header_line(line)
+            continue
+        
+        groups.append(match.groups())
+        sessions.append(tracker.record())
+        if len(groups) == batch_size:
+            yield _columns_from_groups(groups, sessions)
+            groups = []
+            sessions = []
+    
+    if groups:
+        yield _columns_from_groups(groups, sessions)
+
 def parse_erpc_log(log_text):
-    """Parse ERPC log data into structured format"""
-    
-    pattern = r'Samples: (\d+) \| Vout: ([\d.]+)V \| Iload: ([\d.]+)A \| E: ([-\d.]+) \| A: ([\d.]+) \| ∇S: ([\d.]+) \| Corr: ([\d.]+) \| ΔS: ([-\d.]+) \| Gate: (\w+)\s+\| PWM: (\d+)'
-    
-    data = {
-        'samples': [],
-        'vout': [],
-        'iload': [],
-        'entropy': [],
-        'gate': [],
-        'pwm': [],
-        'delta_s': []
+    """
+    Parse ERPC log data into typed NumPy columns (see COLUMN_DTYPES),
+    plus the 'session' number of every record.
+
+    log_text may be the whole log as str or bytes, or any iterable of
+    lines, e.g. an open file, which is then streamed without reading it
+    whole. The returned arrays are used as-is by every analysis stage.
+    """
+    
+    if isinstance(log_text, str):
+        log_text = io.StringIO(log_text)
+    elif isinstance(log_text, bytes):
+        log_text = io.BytesIO(log_text)
+    
+    return concatenate_columns(iter_erpc_batches(log_text))
+
+def _open_zstd(path, mode='rb'):
+    if zstandard is None:
+        raise ImportError(f"reading {path} needs the 'zstandard' package (pip install zstandard)")
+    raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return io.BufferedReader(raw)
+
+# Archive suffix -> opener returning a binary, line-iterable stream
+DECOMPRESSORS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+    '.zst': _open_zstd
+}
+
+def is_compressed(path):
+    return Path(path).suffix.lower() in DECOMPRESSORS
+
+def open_log(path):
+    """
+    Open a log as a binary stream, decompressing archives on the fly.
+
+    Decompression happens block by block as the stream is read.
+    """
+    
+    opener = DECOMPRESSORS.get(Path(path).suffix.lower(), open)
+    return opener(path, 'rb')
+
+@contextlib.contextmanager
+def decompressed(path):
+    """
+    Yield the path of a plain file holding the capture's bytes: path
+    itself, or for an archive a temporary copy that is deleted on exit.
+
+    The copy is written block by block, and every byte-level scan (records,
+    frames, bursts, events, Summary and timing lines) runs on it, so an
+    archive is analyzed exactly like the capture it was made from.
+    """
+    
+    if not is_compressed(path):
+        yield path
+        return
+    
+    handle, plain = tempfile.mkstemp(prefix=Path(path).name + '.', suffix='.txt')
+    try:
+        with os.fdopen(handle, 'wb') as out, open_log(path) as f:
+            shutil.copyfileobj(f, out, 1024 * 1024)
+        yield plain
+    finally:
+        os.unlink(plain)
+
+def is_log_file(path):
+    """True for *.txt captures and compressed archives of them"""
+    
+    path = Path(path)
+    if is_compressed(path):
+        path = path.with_suffix('')
+    return path.suffix.lower() == '.txt'
+
+def output_stem(path):
+    """
+    Log path without its .txt suffix, for naming outputs.
+
+    An archive keeps its format as a tag (run.txt.gz -> run_gz), so a
+    capture and its archive in the same batch never write the same
+    report or plot.
+    """
+    
+    path = Path(path)
+    tag = ''
+    if is_compressed(path):
+        tag = '_' + path.suffix.lower().lstrip('.')
+        path = path.with_suffix('')
+    if path.suffix.lower() == '.txt':
+        path = path.with_suffix('')
+    return str(path) + tag
+
+HEADER_MARKERS = (SESSION_BANNER, PARAMETER_HEADER)
+
+# How far past a parameter header its parameter lines are looked for
+PARAMETER_BLOCK_BYTES = 512
+
+def _find_all(mapped, needle, start=0, end=None):
+    """Offsets of every occurrence of needle starting in [start, end) of a bytes-like object"""
+    
+    if end is None:
+        end = len(mapped)
+    offsets = []
+    position = mapped.find(needle, start, end + len(needle) - 1)
+    while position >= 0:
+        offsets.append(position)
+        position = mapped.find(needle, position + 1, end + len(needle) - 1)
+    return offsets
+
+def _has_records(mapped, start, end):
+    """True if a text record or a binary frame sync word lies in [start, end)"""
+    
+    return (RECORD_PATTERN_BYTES.search(mapped, start, end) is not None
+            or mapped.find(FRAME_SYNC, start, end) >= 0)
+
+def scan_sessions(path):
+    """
+    Return the session table of a log: one dict per session with its
+    'session' number, byte 'offset' and parameters (NaN when unknown).
+
+    The file is searched for the banner and parameter headers with
+    bytes.find over a memory map, so no record is parsed; an archive is
+    searched the same way in its decompressed() copy.
+    """
+    
+    if is_compressed(path):
+        with decompressed(path) as plain:
+            return scan_sessions(plain)
+    
+    if os.path.getsize(path) == 0:
+        return []
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        markers = sorted(
+            (offset, marker) for marker in HEADER_MARKERS for offset in _find_all(mapped, marker.encode()))
+        
+        tracker = SessionTracker()
+        previous = 0
+        for offset, marker in markers:
+            # Records between two headers decide whether a parameter block
+            # opens a new session, exactly as in the line-by-line path
+            if _has_records(mapped, previous, offset):
+                tracker.record()
+            
+            line_start = mapped.rfind(b'\n', 0, offset) + 1
+            tracker.header_line(marker, line_start)
+            if marker == PARAMETER_HEADER:
+                for line in mapped[offset:offset + PARAMETER_BLOCK_BYTES].splitlines()[1:]:
+                    if RECORD_PATTERN_BYTES.search(line) or any(m.encode() in line for m in HEADER_MARKERS):
+                        break
+                    tracker.header_line(line)
+            previous = offset
+        
+        if _has_records(mapped, previous, len(mapped)):
+            tracker.record()
+    
+    return tracker.sessions
+
+# Target size of one parse task; ranges are cut at the next line boundary
+PARSE_CHUNK_BYTES = 32 * 1024 * 1024
+
+def split_line_ranges(path, chunk_bytes=PARSE_CHUNK_BYTES):
+    """
+    Split a file into (start, end) byte ranges of about chunk_bytes each.
+
+    Every range starts at the beginning of a line and ends where the next
+    one starts, so no record is cut in two.
+    """
+    
+    size = os.path.getsize(path)
+    bounds = [0]
+    
+    with open(path, 'rb') as f:
+        while size - bounds[-1] > chunk_bytes:
+            f.seek(bounds[-1] + chunk_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _parse_byte_range(task):
+    """
+    Worker: parse one (path, start, end, session, rle) line-aligned range,
+    which lies entirely inside that session, into (columns, offsets,
+    positions).
+
+    The file is memory-mapped and matched as raw UTF-8 bytes in place, so
+    nothing is decoded and only the pages in this range are faulted in.
+    offsets maps each BLOCK_NEEDLES kind to the blocks starting in range.
+    positions holds each record's byte offset when the range also holds
+    a frame sync word, for merging with the frames, and is None otherwise.
+    With rle set the records come back as runs (see run_length_encode()),
+    except in a range with frames, whose records are merged first.
+    """
+    
+    path, start, end, session, rle = task
+    positions = None
+    if start == end:
+        columns, offsets = empty_columns(), {kind: [] for kind in BLOCK_NEEDLES}
+    else:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(FRAME_SYNC, start, end) < 0:
+                groups = RECORD_PATTERN_BYTES.findall(mapped, start, end)
+            else:
+                matches = list(RECORD_PATTERN_BYTES.finditer(mapped, start, end))
+                groups = [match.groups(b'') for match in matches]
+                positions = np.array([match.start() for match in matches], dtype=np.int64)
+            columns = _columns_from_groups(groups, session)
+            offsets = {kind: _find_all(mapped, needle, start, end) for kind, needle in BLOCK_NEEDLES.items()}
+    
+    if rle and positions is None:
+        columns = run_length_encode(columns)
+    elif rle:
+        columns['run_length'] = np.ones(len(positions), dtype=np.int64)
+    return columns, offsets, positions
+
+def parse_erpc_file(path, workers=None, chunk_bytes=PARSE_CHUNK_BYTES):
+    """Parse a log file into typed columns (see parse_erpc_capture())"""
+    
+    return parse_erpc_capture(path, workers, chunk_bytes)[0]
+
+def parse_erpc_capture(path, workers=None, chunk_bytes=PARSE_CHUNK_BYTES, rle=False):
+    """
+    Parse a log file into typed columns, using a process pool for big files.
+
+    The file is split into line-aligned byte ranges that are parsed
+    independently and concatenated back in file order, which is the order
+    the firmware emitted the samples in. workers=None uses every core;
+    files that fit in one range are parsed in-process. Compressed logs
+    are parsed from their decompressed() copy, so an archive yields the
+    same records, frames and block offsets as the plain capture.
+    
+    Ranges are also cut at every session start from scan_sessions(), so
+    each task knows its session number without looking at its neighbours.
+    Binary telemetry frames in a plain capture are decoded as well (see
+    parse_frame_capture()) and merged in at their byte offsets, so records
+    and frames keep their file order across a counter reset.
+    
+    With rle set every range is run-length encoded as it is parsed, and
+    the runs are merged across range boundaries afterwards, so the full
+    record columns are never held at once.
+    
+    Returns (data, blocks): blocks holds the session table ('sessions')
+    and, for each BLOCK_NEEDLES kind, the byte offsets found while the
+    ranges were parsed, so bursts, events, summaries and timing dumps are
+    decoded later without another scan of the file.
+    """
+    
+    if is_compressed(path):
+        with decompressed(path) as plain:
+            return parse_erpc_capture(plain, workers, chunk_bytes, rle)
+    
+    sessions = scan_sessions(path)
+    session_offsets = [session['offset'] for session in sessions]
+    bounds = sorted({offset for pair in split_line_ranges(path, chunk_bytes) for offset in pair}
+                    | set(session_offsets))
+    tasks = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        session = max(int(np.searchsorted(session_offsets, start, side='right')) - 1, 0)
+        tasks.append((path, start, end, session, rle))
+    if not tasks:
+        tasks = [(path, 0, 0, 0, rle)]
+    
+    if workers == 1 or len(tasks) == 1:
+        results = list(map(_parse_byte_range, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_byte_range, tasks))
+    data = concatenate_columns(columns for columns, _, _ in results)
+    
+    # Tasks are in file order, so the offsets come out sorted
+    blocks = {kind: np.array([offset for _, offsets, _ in results for offset in offsets[kind]], dtype=np.int64)
+              for kind in BLOCK_NEEDLES}
+    blocks['sessions'] = sessions
+    
+    frames, frame_offsets = parse_frame_capture(path, sessions, blocks)
+    if rle:
+        frames['run_length'] = np.ones(len(frame_offsets), dtype=np.int64)
+    if not len(frames['samples']):
+        return (run_length_encode(data) if rle else data), blocks
+    if not len(data['samples']):
+        return (run_length_encode(frames) if rle else frames), blocks
+    
+    # A range without a sync word holds no frame, so its records may all
+    # sort at the range start
+    record_offsets = np.concatenate([
+        np.full(len(columns['samples']), start, dtype=np.int64) if positions is None else positions
+        for (columns, _, positions), (_, start, _, _, _) in zip(results, tasks)])
+    data = concatenate_columns([data, frames])
+    order = np.argsort(np.concatenate([record_offsets, frame_offsets]), kind='stable')
+    data = {key: column[order] for key, column in data.items()}
+    return (run_length_encode(data) if rle else data), blocks
+
+# Firmware constants from ERPC.ino, used to rebuild the GEP terms from the
+# raw ADC counts carried by binary telemetry frames
+VREF = 5.0
+ADC_MAX = 1023
+VOUT_SCALE = 2.4
+ISENSE_SCALE = 1.0
+VREF_TARGET = 5.0
+ALPHA = 0.3
+BETA = 0.5
+
+# Binary telemetry frame ('b' command), see TelemetryFrame in ERPC.ino
+FRAME_SYNC = b'\xa5\x5a'
+FRAME_DTYPE = np.dtype([
+    ('sync', '<u2'),
+    ('sample', '<u4'),
+    ('vout_raw', '<u2'),
+    ('vout_prev_raw', '<u2'),
+    ('iload_raw', '<u2'),     # bit 15 = gate enabled
+    ('pwm', 'u1'),
+    ('crc', 'u1')             # CRC-8 (poly 0x07) over sample..pwm
+])
+FRAME_SYNC_WORD = int.from_bytes(FRAME_SYNC, 'little')
+FRAME_GATE_BIT = 0x8000
+
+def _crc8_table(poly=0x07):
+    table = np.arange(256, dtype=np.uint16)
+    for _ in range(8):
+        table = np.where(table & 0x80, (table << 1) ^ poly, table << 1) & 0xFF
+    return table.astype(np.uint8)
+
+CRC8_TABLE = _crc8_table()
+
+def frame_crc(frames):
+    """CRC-8 of every frame's payload, computed as the firmware does"""
+    
+    raw = np.ascontiguousarray(frames).view(np.uint8).reshape(len(frames), FRAME_DTYPE.itemsize)
+    crc = np.zeros(len(frames), dtype=np.uint8)
+    for column in range(2, FRAME_DTYPE.itemsize - 1):
+        crc = CRC8_TABLE[crc ^ raw[:, column]]
+    return crc
+
+def find_frames(buffer):
+    """
+    Return (frames, offsets): the valid telemetry frames in a bytes-like
+    capture as a FRAME_DTYPE array, and the byte offset of each.
+
+    A capture that is nothing but frames is viewed in place with a single
+    np.frombuffer call. Otherwise every sync word found by buffer.find is
+    a candidate, so memory grows with the frames rather than the file;
+    those failing the CRC (text, or frames corrupted on the wire) are
+    dropped, as is any candidate overlapping an earlier valid frame.
+    """
+    
+    size = FRAME_DTYPE.itemsize
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    
+    if len(raw) and len(raw) % size == 0:
+        frames = np.frombuffer(buffer, dtype=FRAME_DTYPE)
+        if np.all(frames['sync'] == FRAME_SYNC_WORD) and np.array_equal(frame_crc(frames), frames['crc']):
+            return frames, np.arange(len(frames), dtype=np.int64) * size
+    
+    starts = np.array(_find_all(buffer, FRAME_SYNC, 0, max(len(raw) - size + 1, 0)), dtype=np.int64)
+    frames = raw[starts[:, None] + np.arange(size)].view(FRAME_DTYPE).ravel()
+    
+    valid = frame_crc(frames) == frames['crc']
+    frames, starts = frames[valid], starts[valid]
+    
+    # A sync word inside a frame's payload passes the CRC 1 time in 256
+    if np.any(np.diff(starts) < size):
+        keep = []
+        end = 0
+        for i, start in enumerate(starts.tolist()):
+            if start >= end:
+                keep.append(i)
+                end = start + size
+        frames, starts = frames[keep], starts[keep]
+    
+    return frames, starts
+
+def adc_volts(raw):
+    """ADC counts -> volts at the pin, in float32 like readVout()/readIload()"""
+    
+    return (np.asarray(raw).astype(np.float32) / np.float32(ADC_MAX)) * np.float32(VREF)
+
+def frame_columns(frames, session=0, alpha=ALPHA, beta=BETA):
+    """
+    Rebuild record columns (same layout as parse_erpc_log()) from frames.
+
+    The GEP terms are recomputed from the raw counts with the firmware's
+    32-bit float arithmetic. session, alpha and beta may be scalars or
+    one value per frame.
+    """
+    
+    f32 = np.float32
+    vout = adc_volts(frames['vout_raw']) * f32(VOUT_SCALE)
+    vout_prev = adc_volts(frames['vout_prev_raw']) * f32(VOUT_SCALE)
+    iload = adc_volts(frames['iload_raw'] & (FRAME_GATE_BIT - 1)) * f32(ISENSE_SCALE)
+    
+    entropy = f32(VREF_TARGET) - vout
+    salience = np.abs(vout * iload - vout_prev * iload)
+    gradient = np.abs(vout - vout_prev)
+    correction = f32(1.0) + np.asarray(alpha, dtype=f32) * salience - np.asarray(beta, dtype=f32) * gradient
+    
+    count = len(frames)
+    return {
+        'samples': frames['sample'].astype(np.int64),
+        'vout': vout,
+        'iload': iload,
+        'entropy': entropy,
+        'salience': salience,
+        'gradient': gradient,
+        'correction': correction.astype(f32),
+        'delta_s': (entropy * correction).astype(f32),
+        'gate': ((frames['iload_raw'] & FRAME_GATE_BIT) != 0).astype(np.uint8),
+        'pwm': frames['pwm'].astype(np.uint8),
+        'session': np.broadcast_to(np.asarray(session, dtype=SESSION_DTYPE), count).copy()
+    }
+
+def parse_frame_capture(path, sessions=None, blocks=None):
+    """
+    Decode the binary telemetry frames of a capture into (columns,
+    offsets), with the byte offset of every frame.
+
+    Each frame takes the session whose header precedes it, and that
+    session's Alpha/Beta (firmware defaults when unknown). sessions is
+    the scan_sessions() table, rescanned when not given; blocks holds
+    known burst/event offsets (see parse_erpc_capture()), searched for
+    when not given.
+    """
+    
+    if is_compressed(path):
+        with decompressed(path) as plain:
+            return parse_frame_capture(plain, sessions, blocks)
+    
+    no_frames = empty_columns(), np.zeros(0, dtype=np.int64)
+    if os.path.getsize(path) == 0:
+        return no_frames
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped.find(FRAME_SYNC) < 0:
+            return no_frames
+        frames, offsets = find_frames(mapped)
+        frames = frames.copy()
+        
+        # Burst and event payloads are raw counts and can mimic a frame
+        for kind, sync in (('burst', BURST_SYNC), ('event', EVENT_SYNC)):
+            candidates = _find_all(mapped, sync) if blocks is None else blocks[kind]
+            if not len(candidates):
+                continue
+            for start, end, _, _ in find_bursts(mapped, sync, candidates):
+                inside = (offsets >= start) & (offsets < end)
+                frames, offsets = frames[~inside], offsets[~inside]
+    
+    if sessions is None:
+        sessions = scan_sessions(path)
+    if not sessions:
+        return frame_columns(frames), offsets
+    
+    index = np.searchsorted([s['offset'] for s in sessions], offsets, side='right') - 1
+    index = np.maximum(index, 0)
+    alpha = np.array([s['alpha'] for s in sessions])
+    beta = np.array([s['beta'] for s in sessions])
+    alpha = np.where(np.isnan(alpha), ALPHA, alpha)[index]
+    beta = np.where(np.isnan(beta), BETA, beta)[index]
+    return frame_columns(frames, np.array([s['session'] for s in sessions])[index], alpha, beta), offsets
+
+# Burst capture block ('c' command), see BurstHeader in ERPC.ino: header,
+# count 3-byte entries, then a little-endian CRC-16/XMODEM over all but the
+# sync. Triggered event captures ('a' command) use the same layout.
+BURST_SYNC = b'\xa5\x5b'
+EVENT_SYNC = b'\xa5\x5c'
+BURST_HEADER_DTYPE = np.dtype([
+    ('sync', '<u2'),
+    ('first_sample', '<u4'),
+    ('count', '<u2'),
+    ('period_us', '<u2'),
+    ('flags', 'u1'),          # bit 0 = filter on, bit 1 = fixed point, bit 2/3 = A/∇S trigger
+    ('trigger', '<u2')        # entry index of the trigger, 0xFFFF for plain bursts
+])
+BURST_ENTRY_BYTES = 3
+BURST_MAX_SAMPLES = 8192      # Larger counts are taken as a false sync match
+
+def _crc16_xmodem_table(poly=0x1021):
+    table = np.arange(256, dtype=np.uint32) << 8
+    for _ in range(8):
+        table = np.where(table & 0x8000, (table << 1) ^ poly, table << 1) & 0xFFFF
+    return table.astype(np.uint16).tolist()
+
+CRC16_TABLE = _crc16_xmodem_table()
+
+def crc16_xmodem(data):
+    """CRC-16/XMODEM of a bytes-like object, as avr-libc _crc_xmodem_update()"""
+    
+    crc = 0
+    for byte in bytes(data):
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+def find_bursts(buffer, sync=BURST_SYNC, offsets=None):
+    """
+    Return [(offset, end, header, entries)] for every burst block (or
+    event block, with sync=EVENT_SYNC) with a valid CRC in a bytes-like
+    capture; entries is a uint32 array of the packed 24-bit words, one
+    per control step. offsets limits the search to known sync positions.
+    """
+    
+    header_size = BURST_HEADER_DTYPE.itemsize
+    bursts = []
+    for offset in (_find_all(buffer, sync) if offsets is None else offsets):
+        offset = int(offset)
+        header = np.frombuffer(buffer[offset:offset + header_size], dtype=BURST_HEADER_DTYPE)
+        if len(header) == 0 or header['count'][0] > BURST_MAX_SAMPLES:
+            continue
+        
+        payload_end = offset + header_size + int(header['count'][0]) * BURST_ENTRY_BYTES
+        block = bytes(buffer[offset + len(BURST_SYNC):payload_end + 2])
+        if len(block) != payload_end + 2 - offset - len(BURST_SYNC):
+            continue
+        if crc16_xmodem(block[:-2]) != int.from_bytes(block[-2:], 'little'):
+            continue
+        
+        packed = np.frombuffer(block[header_size - len(BURST_SYNC):-2], dtype=np.uint8).reshape(-1, BURST_ENTRY_BYTES)
+        entries = packed[:, 0].astype(np.uint32) | packed[:, 1].astype(np.uint32) << 8 | packed[:, 2].astype(np.uint32) << 16
+        bursts.append((offset, payload_end + 2, header[0].copy(), entries))
+    return bursts
+
+def burst_columns(header, entries, session=0, alpha=ALPHA, beta=BETA):
+    """
+    Rebuild record columns for one burst: one row per control step, with
+    the GEP terms recomputed as for telemetry frames (see frame_columns()).
+    """
+    
+    vout = entries & 0x3FF
+    frames = np.zeros(len(entries), dtype=FRAME_DTYPE)
+    frames['sample'] = int(header['first_sample']) + np.arange(len(entries))
+    frames['vout_raw'] = vout
+    frames['vout_prev_raw'] = np.concatenate([vout[:1], vout[:-1]])
+    frames['iload_raw'] = (entries >> 10) & 0x3FF | ((entries >> 20) & 1) * FRAME_GATE_BIT
+    frames['pwm'] = ((entries >> 20) & 1) * 128
+    return frame_columns(frames, session, alpha, beta)
+
+def _decode_blocks(path, sessions, sync, offsets=None):
+    """
+    [(header, columns)] for every burst or event block in a capture, each
+    tagged with its session's number and Alpha/Beta. offsets are the sync
+    positions found by the ingest pass, searched for when not given.
+    """
+    
+    if offsets is not None and not len(offsets):
+        return []
+    if is_compressed(path):
+        with decompressed(path) as plain:
+            return _decode_blocks(plain, sessions, sync, offsets)
+    if os.path.getsize(path) == 0:
+        return []
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if offsets is None and mapped.find(sync) < 0:
+            return []
+        blocks = find_bursts(mapped, sync, offsets)
+    
+    if sessions is None:
+        sessions = scan_sessions(path)
+    offsets = [session['offset'] for session in sessions]
+    
+    decoded = []
+    for offset, _, header, entries in blocks:
+        session = sessions[max(int(np.searchsorted(offsets, offset, side='right')) - 1, 0)] if sessions else {}
+        alpha = session.get('alpha', np.nan)
+        beta = session.get('beta', np.nan)
+        decoded.append((header, burst_columns(header, entries, session.get('session', 0),
+                                              ALPHA if np.isnan(alpha) else alpha, BETA if np.isnan(beta) else beta)))
+    return decoded
+
+def parse_burst_capture(path, sessions=None, offsets=None):
+    """Decode every burst in a capture: a list of column sets, one per burst"""
+    
+    return [columns for _, columns in _decode_blocks(path, sessions, BURST_SYNC, offsets)]
+
+def parse_event_capture(path, sessions=None, offsets=None):
+    """Decode every triggered event in a capture: [(header, columns)]"""
+    
+    return _decode_blocks(path, sessions, EVENT_SYNC, offsets)
+
+# Periodic on-device counter record (see updateSummary() in ERPC.ino);
+# Vmin/Vmax/Vsum are Vout ADC counts, Psum is sum(Vout*Iload counts) >> 4,
+# Ms the window length (missing in captures from earlier firmware).
+# Gate OFF was labelled Skipped by earlier firmware. ERPC_PULSE_COUNT builds
+# append Timer1 Periods and emitted Pulses
+SUMMARY_PATTERN = re.compile(
+    rb'Summary: Steps: (\d+) \| Transitions: (\d+) \| Gate ON: (\d+) \| (?:Gate OFF|Skipped): (\d+) \| '
+    rb'Vmin: (\d+) \| Vmax: (\d+) \| Vsum: (\d+) \| Psum: (\d+)(?: \| Ms: (\d+))?(?: \| Periods: (\d+) \| Pulses: (\d+))?'
+)
+SUMMARY_KEYS = ('steps', 'transitions', 'gate_on', 'gate_off', 'vmin', 'vmax', 'vsum', 'psum', 'ms', 'periods', 'pulses')
+PSUM_SHIFT = 4
+CONTROL_PERIOD_S = 1e-4        # SAMPLE_RATE_HZ = 10000; nominal, overruns stretch it
+
+def parse_summaries(path, sessions=None, offsets=None):
+    """
+    On-device counter windows of a capture as int64 columns
+    (SUMMARY_KEYS plus 'session'), or None if the capture has none.
+    'ms', 'periods' and 'pulses' are only present if every window has them.
+    
+    These are kept apart from the record columns: each row covers every
+    control step of one summary interval rather than a single record.
+    offsets are the line starts found by the ingest pass, searched for
+    when not given.
+    """
+    
+    if offsets is not None and not len(offsets):
+        return None
+    if is_compressed(path):
+        with decompressed(path) as plain:
+            return parse_summaries(plain, sessions, offsets)
+    if os.path.getsize(path) == 0:
+        return None
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        candidates = _find_all(mapped, BLOCK_NEEDLES['summary']) if offsets is None else offsets
+        rows, offsets = [], []
+        for offset in map(int, candidates):
+            match = SUMMARY_PATTERN.match(mapped, offset)
+            if match:
+                rows.append(match.groups())
+                offsets.append(offset)
+    if not rows:
+        return None
+    
+    if sessions is None:
+        sessions = scan_sessions(path)
+    starts = [session['offset'] for session in sessions]
+    counters = {key: np.array(column, dtype=np.int64)
+                for key, column in zip(SUMMARY_KEYS, zip(*rows)) if None not in column}
+    counters['session'] = np.array([sessions[max(int(np.searchsorted(starts, offset, side='right')) - 1, 0)]['session']
+                                    if sessions else 0 for offset in offsets], dtype=np.int64)
+    return counters
+
+def select_summaries(counters, session=None):
+    """Counter windows of the given session number(s), or None if none are left"""
+    
+    if counters is None or session is None:
+        return counters
+    keep = np.isin(counters['session'], np.atleast_1d(session))
+    return {key: column[keep] for key, column in counters.items()} if keep.any() else None
+
+# Control step timing dump of an ERPC_TIMING build ('t', see printTiming())
+TIMING_PATTERN = re.compile(rb'Timing: Steps: (\d+) \| Overruns: (\d+) \| Period: ([\d.]+)us \| Bin: ([\d.]+)us')
+TIMING_PHASE_PATTERN = re.compile(rb'Phase (\w+): Mean: ([\d.]+)us \| Max: ([\d.]+)us')
+TIMING_HISTOGRAM_PATTERN = re.compile(rb'Histogram:((?: \d+)+)')
+TIMING_BLOCK_BYTES = 1024
+
+def parse_timing(path, offsets=None):
+    """
+    The last control step timing dump in a capture, or None.
+
+    Returns steps, overruns, period_us, bin_us, phases ({name: (mean_us,
+    max_us)}) and histogram: step counts per bin_us-wide bin of duration,
+    the last bin holding the steps that overran their period. offsets
+    are the dump starts found by the ingest pass, searched for when not
+    given.
+    """
+    
+    if offsets is not None and not len(offsets):
+        return None
+    if is_compressed(path):
+        with decompressed(path) as plain:
+            return parse_timing(plain, offsets)
+    if os.path.getsize(path) == 0:
+        return None
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        candidates = _find_all(mapped, BLOCK_NEEDLES['timing']) if offsets is None else offsets
+        for offset in reversed(candidates):
+            block = mapped[int(offset):int(offset) + TIMING_BLOCK_BYTES]
+            header = TIMING_PATTERN.match(block)
+            histogram = TIMING_HISTOGRAM_PATTERN.search(block)
+            if header and histogram:
+                break
+        else:
+            return None
+    
+    # Only the phase lines before this dump's histogram belong to it
+    phases = TIMING_PHASE_PATTERN.finditer(block, 0, histogram.start())
+    return {
+        'steps': int(header.group(1)),
+        'overruns': int(header.group(2)),
+        'period_us': float(header.group(3)),
+        'bin_us': float(header.group(4)),
+        'phases': {m.group(1).decode(): (float(m.group(2)), float(m.group(3))) for m in phases},
+        'histogram': np.array(histogram.group(1).split(), dtype=np.int64)
+    }
+
+# Start of each kind of side block in a capture. The ingest pass records
+# where they occur, so decoding them never rescans the file
+BLOCK_NEEDLES = {
+    'burst': BURST_SYNC,
+    'event': EVENT_SYNC,
+    'summary': b'Summary: ',
+    'timing': b'Timing: Steps: '
+}
+
+def decode_side_blocks(path, blocks):
+    """
+    Decode the side blocks located by the ingest pass (see
+    parse_erpc_capture()): (bursts, events, counters, timing). An archive
+    is decompressed once for all of them, and only if it has any.
+    """
+    
+    if not any(len(blocks[kind]) for kind in BLOCK_NEEDLES):
+        return [], [], None, None
+    
+    sessions = blocks['sessions']
+    with decompressed(path) as plain:
+        return (parse_burst_capture(plain, sessions, blocks['burst']),
+                parse_event_capture(plain, sessions, blocks['event']),
+                parse_summaries(plain, sessions, blocks['summary']),
+                parse_timing(plain, blocks['timing']))
+
+# On-disk cache of parsed columns; override the location with ERPC_CACHE_DIR
+CACHE_DIR = Path(os.environ.get('ERPC_CACHE_DIR', Path.home() / '.cache' / 'erpc'))
+
+# Bump whenever the parsed column layout changes, to orphan old entries
+CACHE_VERSION = 6
+
+def _content_digest(path, block_bytes=1024 * 1024):
+    """BLAKE2b digest of a file's bytes, read in fixed-size blocks"""
+    
+    digest = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(block_bytes)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.digest()
+
+def cache_path(path, rle=False):
+    """
+    Return the cache entry for a log file in its current state.
+
+    The entry name combines a hash of the file's absolute path with a key
+    over its size, mtime and content, so any change to the file maps to a
+    new entry and the old one is replaced on the next write. Run-length
+    encoded columns (rle) are kept in an entry of their own.
+    """
+    
+    path = Path(path).resolve()
+    stat = path.stat()
+    
+    key = hashlib.blake2b(digest_size=16)
+    key.update(f'{CACHE_VERSION}:{stat.st_size}:{stat.st_mtime_ns}:'.encode())
+    key.update(_content_digest(path))
+    
+    name = f'{path}:rle' if rle else str(path)
+    prefix = hashlib.blake2b(name.encode('utf-8'), digest_size=8).hexdigest()
+    return CACHE_DIR / f'{prefix}-{key.hexdigest()}.npz'
+
+def _write_cache(entry, data):
+    """Store columns at entry atomically, dropping stale entries for the same file"""
+    
+    prefix = entry.name.split('-', 1)[0]
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        for stale in entry.parent.glob(f'{prefix}-*.npz'):
+            stale.unlink()
+        
+        partial = entry.with_suffix('.tmp')
+        with open(partial, 'wb') as f:
+            np.savez(f, **data)
+        os.replace(partial, entry)
+    except OSError:
+        # The cache is only an accelerator; an unwritable cache dir is not an error
+        pass
+
+def _is_block_key(key):
+    """True for cache entry arrays that hold the block table, not columns"""
+    
+    return key.startswith('block_') or key.startswith('session_')
+
+def load_erpc_file(path, use_cache=True, workers=None):
+    """
+    Parse a log file, reusing the on-disk column cache when it is current.
+
+    Returns (data, from_cache); see load_erpc_capture().
+    """
+    
+    data, _, from_cache = load_erpc_capture(path, use_cache, workers)
+    return data, from_cache
+
+def load_erpc_capture(path, use_cache=True, workers=None, rle=False):
+    """
+    Parse a log file and locate its side blocks, reusing the on-disk cache
+    when it is current.
+
+    Returns (data, blocks, from_cache) as in parse_erpc_capture(); the
+    block offsets and session table are cached with the columns. A cold
+    or stale entry falls back to parsing and refreshes the cache.
+    """
+    
+    if not use_cache:
+        return (*parse_erpc_capture(path, workers, rle=rle), False)
+    
+    entry = cache_path(path, rle)
+    if entry.exists():
+        try:
+            with np.load(entry) as cached:
+                data = {key: cached[key] for key in cached.files if not _is_block_key(key)}
+                blocks = {kind: cached['block_' + kind] for kind in BLOCK_NEEDLES}
+                blocks['sessions'] = _sessions_from_arrays(cached)
+                return data, blocks, True
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+    
+    data, blocks = parse_erpc_capture(path, workers, rle=rle)
+    arrays = {'block_' + kind: blocks[kind] for kind in BLOCK_NEEDLES}
+    _write_cache(entry, {**data, **arrays, **_sessions_to_arrays(blocks['sessions'])})
+    return data, blocks, False
+
+# Bytes between sample-index entries, and bytes parsed per step of a range read
+INDEX_STRIDE_BYTES = 256 * 1024
+RANGE_BLOCK_BYTES = 1024 * 1024
+
+def sample_index_path(path):
+    return Path(str(path) + '.idx.npz')
+
+def build_sample_index(path, stride_bytes=INDEX_STRIDE_BYTES):
+    """
+    Build a sparse map from Samples counter values to byte offsets.
+
+    One entry is taken at the first record after every stride_bytes
+    boundary, so building it costs one short search per stride rather
+    than a scan of the whole file. The session table (scan_sessions())
+    is stored alongside, so range reads never rescan for headers.
+    """
+    
+    size = os.path.getsize(path)
+    samples, offsets = [], []
+    
+    if size > 0:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for position in range(0, size, stride_bytes):
+                if position > 0:
+                    position = mapped.find(b'\n', position) + 1
+                    if position == 0:
+                        break
+                match = RECORD_PATTERN_BYTES.search(mapped, position, min(position + stride_bytes, size))
+                if match is not None and (not offsets or match.start() > offsets[-1]):
+                    samples.append(int(match.group(1)))
+                    offsets.append(match.start())
+    
+    return {
+        'samples': np.array(samples, dtype=np.int64),
+        'offsets': np.array(offsets, dtype=np.int64),
+        'sessions': scan_sessions(path)
+    }
+
+def _sessions_to_arrays(sessions):
+    """Session table as flat arrays for the .idx.npz sidecar and the column cache"""
+    
+    # Sessions from a streamed SessionTracker have no byte offset; stored as -1
+    offsets = [-1 if session['offset'] is None else session['offset'] for session in sessions]
+    arrays = {'session_offsets': np.array(offsets, dtype=np.int64)}
+    for name in PARAMETER_PATTERNS:
+        arrays['session_' + name] = np.array([session[name] for session in sessions], dtype=np.float64)
+    return arrays
+
+def _sessions_from_arrays(arrays):
+    """Inverse of _sessions_to_arrays()"""
+    
+    sessions = []
+    for number, offset in enumerate(arrays['session_offsets']):
+        session = {'session': number, 'offset': None if offset < 0 else int(offset)}
+        session.update({name: float(arrays['session_' + name][number]) for name in PARAMETER_PATTERNS})
+        sessions.append(session)
+    return sessions
+
+def load_sample_index(path):
+    """
+    Return the sample index for a log, building the .idx.npz sidecar if it
+    is missing or was built for a different size or mtime of the file.
+    """
+    
+    stat = os.stat(path)
+    sidecar = sample_index_path(path)
+    
+    if sidecar.exists():
+        try:
+            with np.load(sidecar) as cached:
+                if int(cached['size']) == stat.st_size and int(cached['mtime_ns']) == stat.st_mtime_ns:
+                    return {'samples': cached['samples'], 'offsets': cached['offsets'],
+                            'sessions': _sessions_from_arrays(cached)}
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+    
+    index = build_sample_index(path)
+    try:
+        np.savez(sidecar, size=stat.st_size, mtime_ns=stat.st_mtime_ns, samples=index['samples'],
+                 offsets=index['offsets'], **_sessions_to_arrays(index['sessions']))
+    except OSError:
+        pass
+    return index
+
+def _range_start_offset(index, start):
+    """Byte offset of the last index entry at or before the first occurrence of start"""
+    
+    samples = index['samples']
+    if start is None or len(samples) == 0 or samples[0] > start:
+        return 0
+    
+    # Entry i brackets start if it is <= start and the next entry is past it
+    # (or the counter restarts / the index ends before the next entry)
+    following = np.append(samples[1:], np.iinfo(np.int64).max)
+    brackets = (samples <= start) & ((following > start) | (following < samples))
+    return int(index['offsets'][np.argmax(brackets)])
+
+def read_sample_range(path, start, end, index=None, session=None):
+    """
+    Parse only the records whose Samples counter lies in [start, end].
+
+    Seeks to the nearest index entry before start and parses forward in
+    RANGE_BLOCK_BYTES steps until the counter passes end or restarts, so
+    the cost depends on the window size, not the file size. If the
+    counter restarts (several sessions), the first occurrence is returned;
+    with a session number only that session's bytes are searched.
+    """
+    
+    if index is None:
+        index = load_sample_index(path)
+    
+    size = os.path.getsize(path)
+    sessions = index['sessions'] if 'sessions' in index else scan_sessions(path)
+    session_offsets = [entry['offset'] for entry in sessions] or [0]
+    session_offsets = np.array(session_offsets + [size], dtype=np.int64)
+    pieces = []
+    previous = None
+    found = False
+    
+    if size == 0 or (session is not None and session >= len(session_offsets) - 1):
+        return empty_columns()
+    
+    lower, upper = 0, size
+    if session is not None:
+        lower, upper = int(session_offsets[session]), int(session_offsets[session + 1])
+        inside = (index['offsets'] >= lower) & (index['offsets'] < upper)
+        index = {'samples': index['samples'][inside], 'offsets': index['offsets'][inside]}
+    position = max(_range_start_offset(index, start), lower)
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        while position < upper:
+            # Blocks never cross a session start, so each has one session number
+            number = max(int(np.searchsorted(session_offsets, position, side='right')) - 1, 0)
+            stop = min(position + RANGE_BLOCK_BYTES, size, session_offsets[number + 1])
+            if stop < size:
+                stop = max(mapped.rfind(b'\n', position, stop) + 1, position + 1)
+            block = _columns_from_groups(RECORD_PATTERN_BYTES.findall(mapped, position, stop), number)
+            position = stop
+            
+            samples = block['samples']
+            if len(samples) == 0:
+                continue
+            
+            first = 0
+            if not found:
+                in_range = samples >= (start if start is not None else 0)
+                if end is not None:
+                    in_range &= samples <= end
+                if not in_range.any():
+                    previous = samples[-1]
+                    continue
+                first = int(np.argmax(in_range))
+                found = True
+            
+            # The window ends at the first record past end or at a counter restart
+            if first > 0 or previous is None:
+                previous = samples[first]
+            before = np.concatenate(([previous], samples[first:-1]))
+            done = samples[first:] < before
+            if end is not None:
+                done |= samples[first:] > end
+            stops = np.flatnonzero(done)
+            last = first + (int(stops[0]) if len(stops) else len(samples) - first)
+            
+            pieces.append({key: column[first:last] for key, column in block.items()})
+            if len(stops):
+                break
+            previous = samples[-1]
+    
+    return concatenate_columns(pieces)
+
+def run_length_encode(data):
+    """
+    Collapse consecutive rows with identical state into runs.
+
+    Every column except the Samples counter is part of the state. The
+    result holds one row per run: the state values, 'samples' = the run's
+    first Samples value, and 'run_length' = the number of log records in
+    it. Steady-state captures shrink by the average run length, and
+    analyze_report()/filter_valid_operation() work on the runs directly.
+    Rows that are runs already are merged with their run lengths added,
+    which joins the runs encoded per parse range at the range boundaries.
+    """
+    
+    count = len(data['samples'])
+    same_as_previous = np.ones(max(count - 1, 0), dtype=bool)
+    for key in data:
+        if key not in ('samples', 'run_length'):
+            column = np.asarray(data[key])
+            same_as_previous &= column[1:] == column[:-1]
+    
+    starts = np.flatnonzero(np.concatenate(([count > 0], ~same_as_previous)))
+    runs = {key: np.asarray(column)[starts] for key, column in data.items()}
+    if 'run_length' in data:
+        lengths = np.asarray(data['run_length'])
+        runs['run_length'] = np.add.reduceat(lengths, starts) if count else lengths
+    else:
+        runs['run_length'] = np.diff(np.append(starts, count))
+    
+    return runs
+
+def session_ids(data):
+    """
+    Return a per-row session number.
+
+    Without an explicit 'session' column, a new session starts wherever the
+    Samples counter goes backwards (firmware reset or 'r' command).
+    """
+    
+    if 'session' in data:
+        return np.asarray(data['session'])
+    
+    samples = np.asarray(data['samples'])
+    ids = np.zeros(len(samples), dtype=np.int64)
+    np.cumsum(samples[1:] < samples[:-1], out=ids[1:])
+    return ids
+
+def valid_operation_mask(data, min_voltage=0.5, max_voltage=12.0, sample_range=None, session=None):
+    """
+    Combine all row criteria into one boolean mask.
+
+    sample_range is an inclusive (start, end) pair on the Samples counter,
+    either end may be None. session is one session number or a sequence.
+    """
+    
+    vout = np.asarray(data['vout'])
+    mask = (vout > min_voltage) & (vout < max_voltage)
+    
+    if sample_range is not None:
+        start, end = sample_range
+        samples = np.asarray(data['samples'])
+        if start is not None:
+            mask &= samples >= start
+        if end is not None:
+            mask &= samples <= end
+    
+    if session is not None:
+        mask &= np.isin(session_ids(data), session)
+    
+    return mask
+
+def _mask_selection(mask):
+    """Return a slice when mask selects one contiguous block, else the mask"""
+    
+    indices = np.flatnonzero(mask)
+    if len(indices) == 0:
+        return slice(0, 0)
+    if indices[-1] - indices[0] + 1 == len(indices):
+        return slice(indices[0], indices[-1] + 1)
+    return mask
+
+class FilteredColumns(Mapping):
+    """
+    Read-only column set that applies a row mask lazily.
+
+    Each column is selected on first access and cached, so columns that an
+    analysis never touches are never copied. Contiguous selections are
+    plain views into the parent arrays.
+    """
+    
+    def __init__(self, data, mask):
+        self.data = data
+        self.mask = mask
+        self._selection = _mask_selection(mask)
+        self._cache = {}
+    
+    def __getitem__(self, key):
+        if key not in self._cache:
+            self._cache[key] = np.asarray(self.data[key])[self._selection]
+        return self._cache[key]
+    
+    def __iter__(self):
+        return iter(self.data)
+    
+    def __len__(self):
+        return len(self.data)
+
+def filter_valid_operation(data, min_voltage=0.5, max_voltage=12.0, sample_range=None, session=None, lazy=False):
+    """
+    Filter out periods where potentiometers were being adjusted.
+    Excludes:
+    - Vout < 0.5V (no power / collapse)
+    - Vout > 12V (excessive overvoltage during adjustment)
+    Optionally restricts to a Samples range and/or session(s) as well.
+    
+    With lazy=True the result is a FilteredColumns mapping instead of a dict
+    of copies. Either way, a contiguous selection is returned as views.
+    For run-length encoded input, whole runs are kept or dropped (a Samples
+    range is matched on each run's first sample) and the returned counts
+    are in samples, not runs.
+    """
+    
+    mask = valid_operation_mask(data, min_voltage, max_voltage, sample_range, session)
+    weights = row_weights(data)
+    valid_count = _weighted_count(mask, weights)
+    total_count = len(data['samples']) if weights is None else int(weights.sum())
+    
+    if lazy:
+        return FilteredColumns(data, mask), valid_count, total_count
+    
+    selection = _mask_selection(mask)
+    filtered = {key: np.asarray(column)[selection] for key, column in data.items()}
+    
+    return filtered, valid_count, total_count
+
+# Operating regions keyed by region code (code 0 = outside every region):
+#   nominal_regulation  4.5 <= Vout <= 6.0
+#   overvoltage         Vout > 7.0
+#   undervoltage        0.5 < Vout < 3.0
+REGION_NAMES = ('nominal_regulation', 'overvoltage', 'undervoltage')
+
+# Load bins: light < 1.0A <= medium < 3.0A <= heavy
+LOAD_NAMES = ('light_load', 'medium_load', 'heavy_load')
+LOAD_EDGES = (1.0, 3.0)
+
+# A step in Iload larger than this counts as a load transition
+LOAD_STEP_AMPS = 0.5
+
+def region_codes(vout):
+    """
+    Classify every Vout sample into its region code in one searchsorted pass.
+
+    Edges that belong to the interval above them are nudged down one ULP so
+    a single side='left' search reproduces the mixed </<= region bounds.
+    """
+    
+    vout = np.asarray(vout)
+    dtype = vout.dtype if vout.dtype.kind == 'f' else np.dtype(np.float64)
+    edges = np.array([0.5, 3.0, 4.5, 6.0, 7.0], dtype=dtype)
+    edges[1:3] = np.nextafter(edges[1:3], dtype.type(-np.inf))
+    
+    # Interval index -> region code for the six intervals the edges define
+    lookup = np.array([0, 3, 0, 1, 0, 2], dtype=np.uint8)
+    return lookup[np.searchsorted(edges, vout, side='left')]
+
+def load_codes(iload):
+    """Classify every Iload sample into 0=light, 1=medium, 2=heavy"""
+    
+    iload = np.asarray(iload)
+    return np.searchsorted(np.asarray(LOAD_EDGES, dtype=iload.dtype), iload, side='right')
+
+def _binned_stats(codes, values, nbins, with_m2=True, weights=None):
+    """
+    Return per-code (count, mean, M2) of values, accumulated in float64.
+
+    weights gives each row's multiplicity (a run length for RLE columns).
+    """
+    
+    if weights is None:
+        counts = np.bincount(codes, minlength=nbins)
+        sums = np.bincount(codes, weights=values, minlength=nbins)
+    else:
+        counts = np.bincount(codes, weights=weights, minlength=nbins).astype(np.int64)
+        sums = np.bincount(codes, weights=values * weights, minlength=nbins)
+    means = np.divide(sums, counts, out=np.zeros(nbins), where=counts > 0)
+    if not with_m2:
+        return counts, means, np.zeros(nbins)
+    
+    deviation = values - means[codes]
+    squares = deviation * deviation if weights is None else deviation * deviation * weights
+    m2 = np.bincount(codes, weights=squares, minlength=nbins)
+    return counts, means, m2
+
+def row_weights(data):
+    """Per-row multiplicity: the run lengths of RLE columns, else None"""
+    
+    weights = data.get('run_length')
+    return None if weights is None else np.asarray(weights)
+
+def _weighted_count(mask, weights):
+    """Number of underlying samples selected by a boolean row mask"""
+    
+    if weights is None:
+        return int(np.count_nonzero(mask))
+    return int(weights[mask].sum())
+
+def _count_transitions(gate):
+    """Number of ON<->OFF changes between consecutive rows"""
+    
+    gate = np.asarray(gate)
+    return int(np.count_nonzero(gate[1:] != gate[:-1]))
+
+def _count_load_steps(iload):
+    """Number of consecutive-row Iload changes larger than LOAD_STEP_AMPS"""
+    
+    return int(np.count_nonzero(np.abs(np.diff(np.asarray(iload))) > LOAD_STEP_AMPS))
+
+def compute_report_stats(data):
+    """
+    Fused analysis kernel: every raw statistic the report needs.
+
+    Each column is read a fixed number of times (one classification pass,
+    one bincount pass per statistic) and no mask is built twice. The
+    result is turned into report dictionaries by summarize_report().
+    
+    Run-length encoded columns (see run_length_encode()) are analyzed per
+    run, with every count and mean weighted by the run length.
+    """
+    
+    vout = np.asarray(data['vout'])
+    iload = np.asarray(data['iload'])
+    entropy = np.asarray(data['entropy'])
+    gate = np.asarray(data['gate'])
+    weights = row_weights(data)
+    
+    region_count, region_mean, _ = _binned_stats(
+        region_codes(vout), entropy, len(REGION_NAMES) + 1, with_m2=False, weights=weights)
+    load_count, load_mean, load_m2 = _binned_stats(
+        load_codes(iload), vout, len(LOAD_NAMES), weights=weights)
+    
+    return {
+        'total_samples': len(gate) if weights is None else int(weights.sum()),
+        'switch_count': _count_transitions(gate),
+        'gate_on': _weighted_count(gate != 0, weights),
+        'region_count': region_count,
+        'region_mean_entropy': region_mean,
+        'load_transitions': _count_load_steps(iload),
+        'load_count': load_count,
+        'load_mean_vout': load_mean,
+        'load_m2_vout': load_m2
+    }
+
+def _switching_summary(stats):
+    total_samples = stats['total_samples']
+    switch_count = stats['switch_count']
+    
+    # Traditional PWM would switch every cycle
+    traditional_switches = total_samples
+    
+    # GEP-based switching reduction
+    reduction = ((traditional_switches - switch_count) / traditional_switches) * 100 if traditional_switches > 0 else 0
+    
+    # Average time between switches
+    avg_samples_per_switch = total_samples / (switch_count + 1) if switch_count > 0 else total_samples
+    
+    return {
+        'total_samples': total_samples,
+        'switch_count': switch_count,
+        'traditional_switches': traditional_switches,
+        'reduction_percent': reduction,
+        'avg_samples_per_switch': avg_samples_per_switch,
+        'switching_frequency': switch_count / total_samples if total_samples > 0 else 0
+    }
+
+def _region_summary(stats):
+    total = stats['total_samples']
+    gate_on = stats['gate_on']
+    
+    regions = {}
+    for code, name in enumerate(REGION_NAMES, start=1):
+        regions[name] = {
+            'count': int(stats['region_count'][code]),
+            'avg_entropy': float(stats['region_mean_entropy'][code])
+        }
+    regions['gate_on_time'] = gate_on / total * 100 if total > 0 else 0
+    regions['gate_off_time'] = (total - gate_on) / total * 100 if total > 0 else 0
+    
+    return regions
+
+def _load_summary(stats):
+    metrics = {'load_transitions': stats['load_transitions']}
+    for code, name in enumerate(LOAD_NAMES):
+        count = int(stats['load_count'][code])
+        metrics[name] = {
+            'count': count,
+            'avg_vout': float(stats['load_mean_vout'][code]),
+            'std_vout': float(np.sqrt(stats['load_m2_vout'][code] / count)) if count > 0 else 0
+        }
+    
+    return metrics
+
+def summarize_report(stats):
+    """Turn compute_report_stats() output into the report dictionaries"""
+    
+    return {
+        'switching': _switching_summary(stats),
+        'regions': _region_summary(stats),
+        'load_response': _load_summary(stats)
     }
+
+def analyze_report(data):
+    """Compute switching, region and load-response results in one pass"""
+    
+    return summarize_report(compute_report_stats(data))
+
+class RunningStats:
+    """
+    Per-bin count, mean and M2 (sum of squared deviations) that can be
+    updated chunk by chunk and merged with Chan's parallel form of
+    Welford's algorithm.
+    """
     
-    for match in re.finditer(pattern, log_text):
-        data['samples'].append(int(match.group(1)))
-        data['vout'].append(float(match.group(2)))
-        data['iload'].append(float(match.group(3)))
-        data['entropy'].append(float(match.group(4)))
-        data['gate'].append(1 if match.group(9) == 'ON' else 0)
-        data['pwm'].append(int(match.group(10)))
-        data['delta_s'].append(float(match.group(8)))
+    def __init__(self, nbins):
+        self.count = np.zeros(nbins, dtype=np.int64)
+        self.mean = np.zeros(nbins)
+        self.m2 = np.zeros(nbins)
     
-    return data
+    def update(self, codes, values, with_m2=True, weights=None):
+        """Fold one chunk of (bin code, value) pairs into the running state"""
+        
+        chunk = RunningStats(len(self.count))
+        chunk.count, chunk.mean, chunk.m2 = _binned_stats(codes, values, len(self.count), with_m2, weights)
+        return self.merge(chunk)
+    
+    def merge(self, other):
+        """Combine another RunningStats over the same bins into this one"""
+        
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        nonempty = count > 0
+        weight = np.divide(other.count, count, out=np.zeros(len(count)), where=nonempty)
+        
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta * delta * self.count * weight
+        self.count = count
+        return self
 
-def filter_valid_operation(data, min_voltage=0.5, max_voltage=12.0):
+class ReportAccumulator:
     """
-    Filter out periods where potentiometers were being adjusted.
-    Excludes:
-    - Vout < 0.5V (no power / collapse)
-    - Vout > 12V (excessive overvoltage during adjustment)
+    Mergeable streaming state for analyze_report().
+
+    update() takes consecutive column chunks; merge() appends the state of
+    the rows that follow this one (another chunk, file part or worker).
+    Transitions that straddle a chunk boundary are counted from the
+    remembered first/last rows, so any chunking gives the same report as
+    the in-memory path.
     """
     
-    valid_indices = []
-    for i, v in enumerate(data['vout']):
-        if min_voltage < v < max_voltage:
-            valid_indices.append(i)
+    def __init__(self):
+        self.total_samples = 0
+        self.switch_count = 0
+        self.gate_on = 0
+        self.load_transitions = 0
+        self.first_gate = self.last_gate = None
+        self.first_iload = self.last_iload = None
+        self.regions = RunningStats(len(REGION_NAMES) + 1)
+        self.loads = RunningStats(len(LOAD_NAMES))
     
-    filtered = {}
-    for key in data:
-        filtered[key] = [data[key][i] for i in valid_indices]
+    def update(self, data):
+        """Fold the next chunk of rows into the accumulator"""
+        
+        gate = np.asarray(data['gate'])
+        if len(gate) == 0:
+            return self
+        
+        iload = np.asarray(data['iload'])
+        stats = compute_report_stats(data)
+        
+        chunk = ReportAccumulator()
+        chunk.total_samples = stats['total_samples']
+        chunk.switch_count = stats['switch_count']
+        chunk.gate_on = stats['gate_on']
+        chunk.load_transitions = stats['load_transitions']
+        chunk.first_gate, chunk.last_gate = gate[0], gate[-1]
+        chunk.first_iload, chunk.last_iload = iload[0], iload[-1]
+        chunk.regions.count = stats['region_count']
+        chunk.regions.mean = stats['region_mean_entropy']
+        chunk.loads.count = stats['load_count']
+        chunk.loads.mean = stats['load_mean_vout']
+        chunk.loads.m2 = stats['load_m2_vout']
+        
+        return self.merge(chunk)
+    
+    def merge(self, other):
+        """Append the state of the rows that come after this accumulator's"""
+        
+        if other.total_samples == 0:
+            return self
+        
+        if self.total_samples > 0:
+            self.switch_count += int(other.first_gate != self.last_gate)
+            step = np.abs(np.diff([self.last_iload, other.first_iload]))
+            self.load_transitions += int(step[0] > LOAD_STEP_AMPS)
+        else:
+            self.first_gate = other.first_gate
+            self.first_iload = other.first_iload
+        
+        self.total_samples += other.total_samples
+        self.switch_count += other.switch_count
+        self.gate_on += other.gate_on
+        self.load_transitions += other.load_transitions
+        self.last_gate = other.last_gate
+        self.last_iload = other.last_iload
+        self.regions.merge(other.regions)
+        self.loads.merge(other.loads)
+        return self
+    
+    def stats(self):
+        """Return the accumulated state in compute_report_stats() form"""
+        
+        return {
+            'total_samples': self.total_samples,
+            'switch_count': self.switch_count,
+            'gate_on': self.gate_on,
+            'region_count': self.regions.count,
+            'region_mean_entropy': self.regions.mean,
+            'load_transitions': self.load_transitions,
+            'load_count': self.loads.count,
+            'load_mean_vout': self.loads.mean,
+            'load_m2_vout': self.loads.m2
+        }
+    
+    def report(self):
+        """Return the report dictionaries, as analyze_report() would"""
+        
+        return summarize_report(self.stats())
+
+def stream_report(batches, **criteria):
+    """
+    Build the report out of core from an iterable of column batches.
+
+    Each batch is filtered with filter_valid_operation(**criteria) and
+    folded into a ReportAccumulator, so memory is bounded by one batch.
+    Returns (accumulator, valid_count, total_count).
+    """
+    
+    accumulator = ReportAccumulator()
+    valid_count = total_count = 0
+    
+    for batch in batches:
+        filtered, valid, total = filter_valid_operation(batch, lazy=True, **criteria)
+        accumulator.update(filtered)
+        valid_count += valid
+        total_count += total
+    
+    return accumulator, valid_count, total_count
+
+def session_slices(data):
+    """
+    Map each session number to the slice of rows it occupies.
+
+    Sessions are contiguous in file order, so every slice gives views and
+    sessions can be handed to separate workers without copying or
+    re-scanning the log.
+    """
+    
+    ids = session_ids(data)
+    if len(ids) == 0:
+        return {}
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    ends = np.append(starts[1:], len(ids))
+    return {int(ids[start]): slice(int(start), int(end)) for start, end in zip(starts, ends)}
+
+def analyze_sessions(data, workers=1):
+    """
+    Return {session: report} with one analyze_report() per session.
+
+    workers > 1 analyzes the sessions in a process pool; the default runs
+    them in-process, which is faster unless sessions are very large.
+    """
+    
+    slices = session_slices(data)
+    parts = [{key: np.asarray(column)[rows] for key, column in data.items()} for rows in slices.values()]
+    
+    if workers == 1 or len(parts) < 2:
+        return dict(zip(slices, map(analyze_report, parts)))
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(slices, pool.map(analyze_report, parts)))
+
+class LogFollower:
+    """
+    Incrementally analyze a capture file that is still being written.
+
+    Remembers the byte offset just past the last complete line, the
+    SessionTracker and the ReportAccumulator state; each poll() parses
+    only what was appended
+    since, so a refresh costs time proportional to the new data. A file
+    that shrinks (capture restarted) is re-read from the start.
+    """
     
-    return filtered, len(valid_indices), len(data['samples'])
+    def __init__(self, path, chunk_bytes=PARSE_CHUNK_BYTES, **criteria):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.criteria = criteria
+        self.reset()
+    
+    def reset(self):
+        self.offset = 0
+        self.tracker = SessionTracker()
+        self.accumulator = ReportAccumulator()
+        self.valid_count = 0
+        self.total_count = 0
+    
+    def poll(self):
+        """Parse newly appended complete lines and return them as columns"""
+        
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            self.reset()
+        
+        batches = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while self.offset < size:
+                block = f.read(min(self.chunk_bytes, size - self.offset))
+                end = block.rfind(b'\n') + 1
+                if end == 0:
+                    # Only a partial line so far; pick it up on the next poll
+                    break
+                
+                batch = concatenate_columns(
+                    iter_erpc_batches(block[:end].splitlines(), tracker=self.tracker))
+                filtered, valid, total = filter_valid_operation(batch, lazy=True, **self.criteria)
+                self.accumulator.update(filtered)
+                self.valid_count += valid
+                self.total_count += total
+                batches.append(batch)
+                
+                self.offset += end
+                f.seek(self.offset)
+        
+        return concatenate_columns(batches)
+    
+    def report(self):
+        """Report over everything parsed so far"""
+        
+        return self.accumulator.report()
 
-def analyze_switching_efficiency(data):
+def analyze_switching_efficiency(data, counters=None):
     """
     Calculate switching statistics and efficiency.
     
     Traditional PWM switches on every sample period.
     GEP-based control only switches when entropy crosses threshold.
+    
+    When on-device counters (parse_summaries) are given they are used
+    instead of the records: they count every control step, so the
+    figures are exact rather than inferred from snapshots.
+    
+    Run-length encoded rows count once per sample in their run; gate
+    transitions only happen between runs.
+    """
+    
+    if counters is not None:
+        switching = _switching_summary({
+            'total_samples': int(counters['steps'].sum()),
+            'switch_count': int(counters['transitions'].sum())
+        })
+        switching['source'] = f"on-device counters ({len(counters['steps'])} summaries)"
+        if 'pulses' in counters:
+            # Every Timer1 period would carry a pulse at fixed frequency;
+            # switching loss scales with the pulses actually emitted
+            periods = int(counters['periods'].sum())
+            pulses = int(counters['pulses'].sum())
+            switching['pwm_periods'] = periods
+            switching['pwm_pulses'] = pulses
+            switching['pulse_reduction_percent'] = (periods - pulses) / periods * 100 if periods > 0 else 0
+        return switching
+    
+    gate = np.asarray(data['gate'])
+    weights = row_weights(data)
+    return _switching_summary({
+        'total_samples': len(gate) if weights is None else int(weights.sum()),
+        'switch_count': _count_transitions(gate)
+    })
+
+def analyze_summaries(counters):
+    """
+    Totals of the on-device counters: gate-on ratio, Vout extremes and
+    mean in volts, and the energy delivered over the counted steps.
+
+    A step that overruns stretches the control period, so each window's
+    power sum is integrated over its measured length (Ms). Captures
+    without it fall back to the nominal CONTROL_PERIOD_S per step.
     """
     
-    gate_states = np.array(data['gate'])
-    samples = np.array(data['samples'])
+    volts_per_count = VREF * VOUT_SCALE / ADC_MAX
+    amps_per_count = VREF * ISENSE_SCALE / ADC_MAX
+    watts_per_count = (1 << PSUM_SHIFT) * volts_per_count * amps_per_count
+    steps = int(counters['steps'].sum())
+    if 'ms' in counters:
+        seconds = counters['ms'] / 1000
+        step_seconds = np.divide(seconds, counters['steps'], out=np.zeros(len(seconds)), where=counters['steps'] > 0)
+        energy = float((counters['psum'] * step_seconds).sum()) * watts_per_count
+        duration = float(seconds.sum())
+    else:
+        energy = float(counters['psum'].sum()) * watts_per_count * CONTROL_PERIOD_S
+        duration = steps * CONTROL_PERIOD_S
+    return {
+        'summaries': len(counters['steps']),
+        'steps': steps,
+        'transitions': int(counters['transitions'].sum()),
+        'gate_on': int(counters['gate_on'].sum()),
+        'gate_off': int(counters['gate_off'].sum()),
+        'gate_on_ratio': counters['gate_on'].sum() / steps if steps else np.nan,
+        'vout_min': counters['vmin'].min() * volts_per_count,
+        'vout_max': counters['vmax'].max() * volts_per_count,
+        'vout_mean': counters['vsum'].sum() / steps * volts_per_count if steps else np.nan,
+        'energy_joules': energy,
+        'duration': duration,
+        'duration_measured': 'ms' in counters,
+        'mean_power': energy / duration if duration else np.nan
+    }
+
+def analyze_bursts(bursts):
+    """
+    Switching results of full-rate bursts: (per_burst, pooled).
+
+    Every burst row is one control step, so these count the controller's
+    actual gate transitions rather than changes between records sampled
+    100ms apart. Transitions are counted within each burst only, never
+    across the gap between two bursts.
+    """
     
-    # Count state transitions (OFF->ON or ON->OFF)
-    transitions = np.diff(gate_states)
-    switch_count = np.count_nonzero(transitions)
+    per_burst = [analyze_switching_efficiency(burst) for burst in bursts]
+    pooled = _switching_summary({
+        'total_samples': sum(result['total_samples'] for result in per_burst),
+        'switch_count': sum(result['switch_count'] for result in per_burst)
+    })
+    return per_burst, pooled
+
+# Vout band around the post-event level that counts as settled
+SETTLING_BAND_VOLTS = 0.1
+
+# Trailing steps of an event window averaged as its post-event level
+EVENT_FINAL_STEPS = 32
+
+def analyze_event(header, columns):
+    """
+    Transient metrics of one triggered event capture.
+
+    The pre-event level is the mean Vout before the trigger and the final
+    level the mean of the last EVENT_FINAL_STEPS steps. Settling time runs
+    from the trigger to the last step outside SETTLING_BAND_VOLTS of the
+    final level (None if the window ends outside it). Peak deviation is
+    the largest distance from the final level after the trigger; when the
+    level itself steps by more than the band, overshoot is the excursion
+    past it in the direction of the step.
+    """
     
-    # Total samples during operation
-    total_samples = len(gate_states)
+    vout = np.asarray(columns['vout'], dtype=np.float64)
+    gate = np.asarray(columns['gate'])
+    trigger = min(int(header['trigger']), len(vout) - 1)
+    period_us = int(header['period_us'])
     
-    # Traditional PWM would switch every cycle
-    traditional_switches = total_samples
+    post = vout[trigger:]
+    before = float(vout[:trigger].mean() if trigger > 0 else vout[0])
+    final = float(post[-EVENT_FINAL_STEPS:].mean())
+    step = final - before
     
-    # GEP-based switching reduction
-    reduction = ((traditional_switches - switch_count) / traditional_switches) * 100
+    outside = np.flatnonzero(np.abs(post - final) > SETTLING_BAND_VOLTS)
+    if not len(outside):
+        settling_steps = 0
+    elif outside[-1] == len(post) - 1:
+        settling_steps = None
+    else:
+        settling_steps = int(outside[-1]) + 1
     
-    # Average time between switches
-    avg_samples_per_switch = total_samples / (switch_count + 1) if switch_count > 0 else total_samples
+    if abs(step) > SETTLING_BAND_VOLTS:
+        overshoot = float(max((post.max() - final) if step > 0 else (final - post.min()), 0.0))
+        overshoot_percent = 100 * overshoot / abs(step)
+    else:
+        # A spike that settles back to (nearly) the same count has no step
+        # to measure overshoot against
+        overshoot = np.nan
+        overshoot_percent = np.nan
+    sources = [name for bit, name in ((0x04, 'A'), (0x08, '∇S')) if int(header['flags']) & bit]
     
     return {
-        'total_samples': total_samples,
-        'switch_count': switch_count,
-        'traditional_switches': traditional_switches,
-        'reduction_percent': reduction,
-        'avg_samples_per_switch': avg_samples_per_switch,
-        'switching_frequency': switch_count / total_samples if total_samples > 0 else 0
+        'trigger_sample': int(columns['samples'][trigger]),
+        'source': '+'.join(sources) or '-',
+        'pre_steps': trigger,
+        'post_steps': len(post),
+        'vout_before': before,
+        'vout_final': final,
+        'peak_deviation': float(np.abs(post - final).max()),
+        'overshoot_volts': overshoot,
+        'overshoot_percent': overshoot_percent,
+        'settling_us': None if settling_steps is None else settling_steps * period_us,
+        'gate_toggles': _count_transitions(gate[trigger:])
     }
 
 def analyze_operating_regions(data):
-    """Analyze different operating voltage regions"""
-    
-    vout = np.array(data['vout'])
-    entropy = np.array(data['entropy'])
-    gate = np.array(data['gate'])
-    
-    regions = {
-        'nominal_regulation': {
-            'count': np.sum((vout >= 4.5) & (vout <= 6.0)),
-            'avg_entropy': np.mean(entropy[(vout >= 4.5) & (vout <= 6.0)]) if np.any((vout >= 4.5) & (vout <= 6.0)) else 0
-        },
-        'overvoltage': {
-            'count': np.sum(vout > 7.0),
-            'avg_entropy': np.mean(entropy[vout > 7.0]) if np.any(vout > 7.0) else 0
-        },
-        'undervoltage': {
-            'count': np.sum((vout > 0.5) & (vout < 3.0)),
-            'avg_entropy': np.mean(entropy[(vout > 0.5) & (vout < 3.0)]) if np.any((vout > 0.5) & (vout < 3.0)) else 0
-        },
-        'gate_on_time': np.sum(gate) / len(gate) * 100 if len(gate) > 0 else 0,
-        'gate_off_time': (len(gate) - np.sum(gate)) / len(gate) * 100 if len(gate) > 0 else 0
-    }
+    """Analyze different operating voltage regions (weighted by run length for RLE rows)"""
     
-    return regions
+    gate = np.asarray(data['gate'])
+    weights = row_weights(data)
+    region_count, region_mean, _ = _binned_stats(
+        region_codes(data['vout']), np.asarray(data['entropy']), len(REGION_NAMES) + 1,
+        with_m2=False, weights=weights)
+    
+    return _region_summary({
+        'total_samples': len(gate) if weights is None else int(weights.sum()),
+        'gate_on': _weighted_count(gate != 0, weights),
+        'region_count': region_count,
+        'region_mean_entropy': region_mean
+    })
 
 def calculate_load_response_metrics(data):
-    """Analyze response to load changes"""
-    
-    iload = np.array(data['iload'])
-    vout = np.array(data['vout'])
-    
-    # Find load transitions (>0.5A change)
-    load_changes = np.abs(np.diff(iload)) > 0.5
-    load_transition_count = np.sum(load_changes)
-    
-    # Voltage regulation during different load conditions
-    light_load = iload < 1.0
-    medium_load = (iload >= 1.0) & (iload < 3.0)
-    heavy_load = iload >= 3.0
-    
-    metrics = {
-        'load_transitions': load_transition_count,
-        'light_load': {
-            'count': np.sum(light_load),
-            'avg_vout': np.mean(vout[light_load]) if np.any(light_load) else 0,
-            'std_vout': np.std(vout[light_load]) if np.any(light_load) else 0
-        },
-        'medium_load': {
-            'count': np.sum(medium_load),
-            'avg_vout': np.mean(vout[medium_load]) if np.any(medium_load) else 0,
-            'std_vout': np.std(vout[medium_load]) if np.any(medium_load) else 0
-        },
-        'heavy_load': {
-            'count': np.sum(heavy_load),
-            'avg_vout': np.mean(vout[heavy_load]) if np.any(heavy_load) else 0,
-            'std_vout': np.std(vout[heavy_load]) if np.any(heavy_load) else 0
-        }
-    }
+    """Analyze response to load changes (weighted by run length for RLE rows)"""
     
-    return metrics
+    iload = np.asarray(data['iload'])
+    load_count, load_mean, load_m2 = _binned_stats(
+        load_codes(iload), np.asarray(data['vout']), len(LOAD_NAMES), weights=row_weights(data))
+    
+    return _load_summary({
+        'load_transitions': _count_load_steps(iload),
+        'load_count': load_count,
+        'load_mean_vout': load_mean,
+        'load_m2_vout': load_m2
+    })
 
-def create_visualizations(data, output_file='erpc_analysis.png'):
-    """Create comprehensive visualization plots"""
+def create_visualizations(data, output_file='erpc_analysis.png', timing=None):
+    """Create comprehensive visualization plots (plus the step latency histogram if timing is given)"""
     
-    fig, axes = plt.subplots(4, 1, figsize=(16, 14))
+    if timing is None:
+        fig, axes = plt.subplots(4, 1, figsize=(16, 14))
+    else:
+        fig, axes = plt.subplots(5, 1, figsize=(16, 18))
+    
+    samples = np.asarray(data['samples'])
+    vout = np.asarray(data['vout'])
+    iload = np.asarray(data['iload'])
+    entropy = np.asarray(data['entropy'])
+    gate = np.asarray(data['gate'])
     
-    samples = np.array(data['samples'])
-    vout = np.array(data['vout'])
-    iload = np.array(data['iload'])
-    entropy = np.array(data['entropy'])
-    gate = np.array(data['gate'])
+    # A run-length encoded row holds its state until the next run starts
+    drawstyle = 'steps-post' if 'run_length' in data else 'default'
+    step = 'post' if 'run_length' in data else None
     
     # Plot 1: Voltage over time
-    axes[0].plot(samples, vout, 'b-', linewidth=0.8, alpha=0.7)
+    axes[0].plot(samples, vout, 'b-', linewidth=0.8, alpha=0.7, drawstyle=drawstyle)
     axes[0].axhline(y=5.0, color='g', linestyle='--', linewidth=2, alpha=0.6, label='Target 5V')
     axes[0].axhline(y=4.5, color='orange', linestyle=':', linewidth=1, alpha=0.4)
     axes[0].axhline(y=6.0, color='orange', linestyle=':', linewidth=1, alpha=0.4)
-    axes[0].fill_between(samples, 4.5, 6.0, alpha=0.1, color='green', label='Regulation Band')
+    axes[0].fill_between(samples, 4.5, 6.0, alpha=0.1, color='green', label='Regulation Band', step=step)
     axes[0].set_ylabel('Output Voltage (V)', fontsize=13, fontweight='bold')
     axes[0].set_title('ERPC System Performance - Guided Entropy Principle\nEntropy-Regulated Power Control (Valid Operation Data)', 
                      fontsize=15, fontweight='bold', pad=15)
     axes[0].grid(True, alpha=0.3, linestyle='--')
     axes[0].legend(loc='upper right', fontsize=10)
-    axes[0].set_ylim([min(vout)*0.9, max(vout)*1.1])
+    axes[0].set_ylim([vout.min()*0.9, vout.max()*1.1])
     
     # Plot 2: Load current
-    axes[1].plot(samples, iload, 'r-', linewidth=0.8, alpha=0.7)
-    axes[1].fill_between(samples, 0, iload, alpha=0.2, color='red')
+    axes[1].plot(samples, iload, 'r-', linewidth=0.8, alpha=0.7, drawstyle=drawstyle)
+    axes[1].fill_between(samples, 0, iload, alpha=0.2, color='red', step=step)
     axes[1].set_ylabel('Load Current (A)', fontsize=13, fontweight='bold')
     axes[1].grid(True, alpha=0.3, linestyle='--')
-    axes[1].set_ylim([0, max(iload)*1.1])
+    axes[1].set_ylim([0, iload.max()*1.1])
     
     # Plot 3: Entropy
-    axes[2].plot(samples, entropy, 'purple', linewidth=0.8, alpha=0.7)
+    axes[2].plot(samples, entropy, 'purple', linewidth=0.8, alpha=0.7, drawstyle=drawstyle)
     axes[2].axhline(y=0, color='k', linestyle='--', linewidth=1.5, alpha=0.5, label='Zero Entropy')
     axes[2].axhline(y=0.5, color='orange', linestyle='--', linewidth=2, alpha=0.7, label='Switching Threshold')
-    axes[2].fill_between(samples, 0, entropy, where=(entropy>0), alpha=0.2, color='red', label='High Entropy (Undervoltage)')
-    axes[2].fill_between(samples, entropy, 0, where=(entropy<0), alpha=0.2, color='blue', label='Negative Entropy (Overvoltage)')
+    axes[2].fill_between(samples, 0, entropy, where=(entropy>0), alpha=0.2, color='red', label='High Entropy (Undervoltage)', step=step)
+    axes[2].fill_between(samples, entropy, 0, where=(entropy<0), alpha=0.2, color='blue', label='Negative Entropy (Overvoltage)', step=step)
     axes[2].set_ylabel('Entropy E(x)', fontsize=13, fontweight='bold')
     axes[2].grid(True, alpha=0.3, linestyle='--')
     axes[2].legend(loc='upper right', fontsize=9)
     
     # Plot 4: Gate state with switching events
-    axes[3].fill_between(samples, 0, gate, alpha=0.35, color='green', label='Gate ON Periods')
-    axes[3].plot(samples, gate, 'g-', linewidth=2)
+    axes[3].fill_between(samples, 0, gate, alpha=0.35, color='green', label='Gate ON Periods', step=step)
+    axes[3].plot(samples, gate, 'g-', linewidth=2, drawstyle=drawstyle)
     
     # Mark switching events
-    gate_array = np.array(gate)
+    gate_array = gate
     transitions = np.where(np.abs(np.diff(gate_array)) > 0)[0]
     if len(transitions) > 0:
         axes[3].scatter(samples[transitions], gate_array[transitions], 
@@ -226,56 +2022,32 @@ def create_visualizations(data, output_file='erpc_analysis.png'):
     axes[3].grid(True, alpha=0.3, linestyle='--')
     axes[3].legend(loc='upper right', fontsize=10)
     
+    # Plot 5: Control step duration distribution (ERPC_TIMING builds)
+    if timing is not None:
+        counts = timing['histogram']
+        edges = np.arange(len(counts)) * timing['bin_us']
+        axes[4].bar(edges[:-1], counts[:-1], width=timing['bin_us'] * 0.9, align='edge',
+                    color='steelblue', alpha=0.8, label='Completed steps')
+        axes[4].bar(edges[-1:], counts[-1:], width=timing['bin_us'] * 0.9, align='edge',
+                    color='red', alpha=0.8, label=f"Overruns ({timing['overruns']:,})")
+        axes[4].axvline(x=timing['period_us'], color='k', linestyle='--', linewidth=2, alpha=0.6,
+                        label=f"Period {timing['period_us']:.0f}us")
+        worst = max((longest for _, longest in timing['phases'].values()), default=0.0)
+        axes[4].set_title(f"Control step duration ({timing['steps']:,} steps; longest phase {worst:.1f}us)",
+                          fontsize=12)
+        axes[4].set_yscale('log' if counts.max() > 0 else 'linear')
+        axes[4].set_ylabel('Steps', fontsize=13, fontweight='bold')
+        axes[4].set_xlabel('Step duration (us)', fontsize=13, fontweight='bold')
+        axes[4].grid(True, alpha=0.3, linestyle='--')
+        axes[4].legend(loc='upper right', fontsize=10)
+    
     plt.tight_layout()
     plt.savefig(output_file, dpi=200, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
     print(f"\n✓ Visualization saved to: {output_file}")
 
-def main():
-    print("="*80)
-    print("ERPC DATA ANALYSIS")
-    print("Entropy-Regulated Power Control - Arduino Implementation")
-    print("Guided Entropy Principle (GEP) Framework")
-    print("Lumiea Systems Research Division / ThunderStruck Service LLC")
-    print("="*80)
-    
-    # Check command line arguments
-    if len(sys.argv) < 2:
-        print("\nUsage: python3 erpc_complete_analysis.py <logfile.txt>")
-        print("\nAttempting to use 'erpc_log.txt' in current directory...")
-        log_file = 'erpc_log.txt'
-    else:
-        log_file = sys.argv[1]
-    
-    # Check if file exists
-    if not Path(log_file).exists():
-        print(f"\nERROR: Log file '{log_file}' not found!")
-        print("\nPlease provide the ERPC log file as an argument.")
-        sys.exit(1)
-    
-    # Parse the data
-    print(f"\n[1/5] Parsing ERPC log data from: {log_file}")
-    
-    with open(log_file, 'r') as f:
-        log_text = f.read()
-    
-    data = parse_erpc_log(log_text)
-    print(f"      ✓ Parsed {len(data['samples']):,} total samples")
-    
-    # Filter out potentiometer adjustment periods
-    print("\n[2/5] Filtering valid operation periods...")
-    print("      Excluding: Vout < 0.5V (no power) and Vout > 12V (overvoltage)")
-    filtered_data, valid_count, total_count = filter_valid_operation(data)
-    excluded = total_count - valid_count
-    print(f"      ✓ Valid samples: {valid_count:,}")
-    print(f"      ✓ Excluded samples: {excluded:,} ({excluded/total_count*100:.1f}%)")
-    
-    if valid_count == 0:
-        print("\nERROR: No valid samples found after filtering!")
-        sys.exit(1)
-    
-    # Analyze switching efficiency
-    print("\n[3/5] Analyzing switching efficiency...")
-    switching = analyze_switching_efficiency(filtered_data)
+def print_switching_results(switching):
+    """Print the switching efficiency section of the report"""
     
     print("\n" + "="*80)
     print("SWITCHING EFFICIENCY RESULTS")
@@ -288,10 +2060,31 @@ def main():
     print(f"╚════════════════════════════════════════════════════════════════════╝")
     print(f"\nAvg samples between switches:  {switching['avg_samples_per_switch']:.1f}")
     print(f"Switching frequency:           {switching['switching_frequency']:.4f} transitions/sample")
+    if 'source' in switching:
+        print(f"Source:                        {switching['source']}")
+    if 'pwm_pulses' in switching:
+        print(f"\nTimer1 PWM periods:            {switching['pwm_periods']:,}")
+        print(f"Gate pulses emitted:           {switching['pwm_pulses']:,}")
+        print(f"Switching-loss reduction:      {switching['pulse_reduction_percent']:.2f}% (pulses vs fixed-frequency PWM)")
+
+def print_summary_results(summary):
+    """Print the on-device counter totals"""
     
-    # Analyze operating regions
-    print("\n[4/5] Analyzing operating regions...")
-    regions = analyze_operating_regions(filtered_data)
+    print("\n" + "="*80)
+    print("ON-DEVICE COUNTERS")
+    print("="*80)
+    print(f"Summaries:                     {summary['summaries']:,}")
+    print(f"Control steps:                 {summary['steps']:,}")
+    print(f"Gate transitions:              {summary['transitions']:,}")
+    print(f"Gate ON steps:                 {summary['gate_on']:,} ({100 * summary['gate_on_ratio']:.1f}%)")
+    print(f"Gate OFF steps:                {summary['gate_off']:,}")
+    print(f"Vout min / mean / max:         {summary['vout_min']:.3f}V / {summary['vout_mean']:.3f}V / {summary['vout_max']:.3f}V")
+    print(f"Energy delivered:              {summary['energy_joules']:.3f}J ({summary['mean_power']:.3f}W mean)")
+    print(f"Counted time:                  {summary['duration']:.1f}s "
+          f"({'measured' if summary['duration_measured'] else 'nominal step period, no Ms field'})")
+
+def print_region_results(regions):
+    """Print the operating region section of the report"""
     
     print("\n" + "="*80)
     print("OPERATING REGION ANALYSIS")
@@ -312,13 +2105,14 @@ def main():
     print(f"\nGate Duty Cycle:")
     print(f"  ON time:      {regions['gate_on_time']:.2f}%")
     print(f"  OFF time:     {regions['gate_off_time']:.2f}%")
+
+def print_load_results(load_metrics):
+    """Print the load response section of the report"""
     
-    # Analyze load response
     print("\n" + "="*80)
     print("LOAD RESPONSE ANALYSIS")
     print("="*80)
     
-    load_metrics = calculate_load_response_metrics(filtered_data)
     print(f"\nLoad transitions detected: {load_metrics['load_transitions']:,}")
     
     print(f"\nLight Load (<1.0A):")
@@ -335,11 +2129,272 @@ def main():
     print(f"  Samples:      {load_metrics['heavy_load']['count']:,}")
     print(f"  Avg Vout:     {load_metrics['heavy_load']['avg_vout']:.3f}V")
     print(f"  Std Dev:      {load_metrics['heavy_load']['std_vout']:.3f}V")
+
+def print_timing_results(timing):
+    """Print the control step timing dump"""
+    
+    print("\n" + "="*80)
+    print("CONTROL LOOP TIMING")
+    print("="*80)
+    print(f"Timed steps:                   {timing['steps']:,}")
+    print(f"Overruns:                      {timing['overruns']:,}")
+    print(f"Period budget:                 {timing['period_us']:.1f}us")
+    print(f"\n{'Phase':<12} {'Mean':>9} {'Max':>9}")
+    print("-" * 32)
+    for name, (mean, longest) in timing['phases'].items():
+        print(f"{name:<12} {mean:>7.2f}us {longest:>7.1f}us")
+    
+    counts = timing['histogram']
+    steps = counts.sum()
+    print(f"\n{'Duration':<18} {'Steps':>12} {'Share':>8}")
+    print("-" * 40)
+    for i, count in enumerate(counts):
+        label = "overrun" if i == len(counts) - 1 else f"{i * timing['bin_us']:5.1f}-{(i + 1) * timing['bin_us']:5.1f}us"
+        if count or i == len(counts) - 1:
+            print(f"{label:<18} {count:>12,} {100 * count / steps if steps else 0:>7.2f}%")
+
+def print_burst_results(bursts, per_burst, pooled):
+    """Print the full-rate burst switching table and its pooled result"""
+    
+    print("\n" + "="*80)
+    print("FULL-RATE BURST SWITCHING")
+    print("="*80)
+    print(f"{'Burst':>5}  {'Session':>7}  {'First sample':>12}  {'Steps':>6}  {'Switches':>8}  {'Reduction':>9}")
+    for i, (burst, result) in enumerate(zip(bursts, per_burst)):
+        print(f"{i:>5}  {int(burst['session'][0]):>7}  {int(burst['samples'][0]):>12,}  {result['total_samples']:>6,}"
+              f"  {result['switch_count']:>8,}  {result['reduction_percent']:>8.2f}%")
+    print(f"\nAll bursts: {pooled['switch_count']:,} transitions in {pooled['total_samples']:,} control steps"
+          f" ({pooled['switching_frequency']:.4f}/step, {pooled['reduction_percent']:.2f}% reduction)")
+
+def print_event_results(events):
+    """Print one row of transient metrics per triggered event"""
+    
+    print("\n" + "="*80)
+    print("TRIGGERED EVENTS")
+    print("="*80)
+    print(f"{'Event':>5}  {'Sample':>10}  {'Trigger':>7}  {'Before':>7}  {'Final':>7}  {'Peak dev':>8}"
+          f"  {'Overshoot':>9}  {'Settling':>9}  {'Toggles':>7}")
+    for i, (header, columns) in enumerate(events):
+        event = analyze_event(header, columns)
+        overshoot = f"{event['overshoot_percent']:.0f}%" if not np.isnan(event['overshoot_percent']) else "-"
+        settling = f"{event['settling_us']:,}us" if event['settling_us'] is not None else ">window"
+        print(f"{i:>5}  {event['trigger_sample']:>10,}  {event['source']:>7}  {event['vout_before']:>6.3f}V"
+              f"  {event['vout_final']:>6.3f}V  {event['peak_deviation']:>7.3f}V  {overshoot:>9}"
+              f"  {settling:>9}  {event['gate_toggles']:>7}")
+
+def switching_by_parameter(sessions, reports, name):
+    """
+    Pool the switching results of sessions sharing a value of one
+    parameter (e.g. 'filter'): {value: (samples, switches, per_1k)}.
+
+    Sessions where the parameter is unknown are left out.
+    """
+    
+    values = {session['session']: session.get(name, np.nan) for session in sessions}
+    pooled = {}
+    for session, report in reports.items():
+        value = values.get(session, np.nan)
+        if np.isnan(value):
+            continue
+        samples, switches = pooled.get(value, (0, 0))
+        pooled[value] = (samples + report['switching']['total_samples'],
+                         switches + report['switching']['switch_count'])
+    
+    return {value: (samples, switches, 1000 * switches / samples if samples else 0.0)
+            for value, (samples, switches) in sorted(pooled.items())}
+
+def print_session_results(sessions, reports):
+    """Print one row per session: its parameters and switching results"""
+    
+    parameters = {session['session']: session for session in sessions}
+    
+    def value(session, name, digits=3):
+        number = parameters.get(session, {}).get(name, np.nan)
+        return f"{number:.{digits}f}" if not np.isnan(number) else "-"
+    
+    print("\n" + "="*80)
+    print("SESSION ANALYSIS")
+    print("="*80)
+    print(f"{'Session':>7}  {'Alpha':>6}  {'Beta':>6}  {'Threshold':>9}  {'Filter':>6}  {'Samples':>9}  {'Switches':>8}  {'Reduction':>9}")
+    for session, report in reports.items():
+        switching = report['switching']
+        print(f"{session:>7}  {value(session, 'alpha'):>6}  {value(session, 'beta'):>6}"
+              f"  {value(session, 'threshold'):>9}  {value(session, 'filter', 0):>6}"
+              f"  {switching['total_samples']:>9,}  {switching['switch_count']:>8,}"
+              f"  {switching['reduction_percent']:>8.2f}%")
+    
+    # Sessions toggled with the firmware's 'f' command differ only in filter
+    by_filter = switching_by_parameter(sessions, reports, 'filter')
+    if len(by_filter) > 1:
+        print("\nSwitching by filter size:")
+        for size, (samples, switches, per_1k) in by_filter.items():
+            label = 'off' if size == 1 else f'{size:.0f} samples'
+            print(f"  {label:<12} {switches:>8,} switches / {samples:>9,} samples = {per_1k:7.1f} per 1k")
+
+def follow_log(log_file, interval=2.0):
+    """Tail a growing capture, printing refreshed metrics until Ctrl-C"""
+    
+    follower = LogFollower(log_file)
+    print(f"\nFollowing {log_file} every {interval:g}s (Ctrl-C to stop)...")
+    
+    try:
+        while True:
+            new_rows = len(follower.poll()['samples'])
+            if new_rows:
+                report = follower.report()
+                switching = report['switching']
+                regions = report['regions']
+                print(f"  {time.strftime('%H:%M:%S')}  +{new_rows:,} samples"
+                      f" | valid {follower.valid_count:,}/{follower.total_count:,}"
+                      f" | transitions {switching['switch_count']:,}"
+                      f" | reduction {switching['reduction_percent']:.2f}%"
+                      f" | nominal {regions['nominal_regulation']['count']:,}"
+                      f" | gate ON {regions['gate_on_time']:.1f}%")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    
+    report = follower.report()
+    print_switching_results(report['switching'])
+    print_region_results(report['regions'])
+    print_load_results(report['load_response'])
+
+class AnalysisError(Exception):
+    """A capture with nothing left to analyze; main() prints it as an ERROR line"""
+
+def _batch_row(total_count, valid_count, switching=None, regions=None):
+    """Figures of one capture for the batch summary table (NaN where not measured)"""
+    
+    return {
+        'total_samples': total_count,
+        'valid_samples': valid_count,
+        'switch_count': np.nan if switching is None else switching['switch_count'],
+        'reduction_percent': np.nan if switching is None else switching['reduction_percent'],
+        'gate_on_time': np.nan if regions is None else regions['gate_on_time'],
+        'nominal_samples': np.nan if regions is None else regions['nominal_regulation']['count']
+    }
+
+def analyze_capture(log_file, use_cache=True, sample_range=None, session=None, rle=False, plot=True, workers=None):
+    """
+    Print the full analysis report of one capture and save its plot.
+
+    main() and the batch worker (analyze_log_file()) both run this, so a
+    batch report has every section of an interactive run. Returns the
+    capture's batch summary row; raises AnalysisError when nothing is
+    left to analyze.
+    """
+    
+    # Parse the data
+    print(f"\n[1/5] Parsing ERPC log data from: {log_file}")
+    
+    blocks = None
+    seek_range = sample_range and not is_compressed(log_file)
+    if seek_range:
+        index = load_sample_index(log_file)
+        session_count = len(index['sessions'])
+    else:
+        # A range must cut records, not runs, so it is encoded after selection
+        data, blocks, from_cache = load_erpc_capture(log_file, use_cache=use_cache, workers=workers,
+                                                     rle=rle and not sample_range)
+        total = len(data['samples']) if 'run_length' not in data else int(data['run_length'].sum())
+        print(f"      ✓ Parsed {total:,} total samples" + (" (cached)" if from_cache else ""))
+        session_count = len(np.unique(session_ids(data)))
+    # The Samples counter restarts in every session, so a range alone is ambiguous
+    if sample_range and session is None and session_count > 1:
+        raise AnalysisError(f"The log holds {session_count} sessions; choose one with --session to use --range!")
+    if seek_range:
+        data = concatenate_columns([read_sample_range(log_file, *sample_range, index=index, session=number)
+                                    for number in session or [None]])
+        print(f"      ✓ Parsed {len(data['samples']):,} samples in range {sample_range[0]}:{sample_range[1]}")
+    elif sample_range:
+        data, _, _ = filter_valid_operation(data, -np.inf, np.inf, sample_range=sample_range)
+        print(f"      ✓ Kept {len(data['samples']):,} samples in range {sample_range[0]}:{sample_range[1]}")
+    if sample_range and not len(data['samples']):
+        raise AnalysisError(f"No samples in range {sample_range[0]}:{sample_range[1]}!")
+    
+    # Side blocks were located by the ingest pass; a range query skips them
+    if sample_range:
+        blocks = None
+    bursts, events, counters, timing = [], [], None, None
+    if blocks is not None:
+        bursts, events, counters, timing = decode_side_blocks(log_file, blocks)
+        counters = select_summaries(counters, session)
+    if bursts:
+        steps = sum(len(burst['samples']) for burst in bursts)
+        print(f"      ✓ Found {len(bursts)} full-rate burst(s) ({steps:,} control steps)")
+    if events:
+        print(f"      ✓ Found {len(events)} triggered event(s)")
+    if counters is not None:
+        print(f"      ✓ Found {len(counters['steps'])} on-device counter summaries")
+    if timing is not None:
+        print(f"      ✓ Found a control step timing dump ({timing['steps']:,} steps)")
+    if (bursts or events or counters is not None or timing is not None) and not len(data['samples']):
+        switching = None
+        if counters is not None:
+            switching = analyze_switching_efficiency(data, counters)
+            print_switching_results(switching)
+            print_summary_results(analyze_summaries(counters))
+        if timing is not None:
+            print_timing_results(timing)
+        if bursts:
+            print_burst_results(bursts, *analyze_bursts(bursts))
+        if events:
+            print_event_results(events)
+        return _batch_row(0, 0, switching)
+    
+    if rle:
+        if 'run_length' not in data:
+            data = run_length_encode(data)
+        runs = len(data['samples'])
+        print(f"      ✓ Collapsed into {runs:,} runs ({data['run_length'].sum() / max(runs, 1):.1f} samples/run)")
+    
+    # Filter out potentiometer adjustment periods
+    print("\n[2/5] Filtering valid operation periods...")
+    print("      Excluding: Vout < 0.5V (no power) and Vout > 12V (overvoltage)")
+    if session is not None:
+        print(f"      Restricting to session(s): {', '.join(map(str, session))}")
+    filtered_data, valid_count, total_count = filter_valid_operation(data, session=session)
+    excluded = total_count - valid_count
+    print(f"      ✓ Valid samples: {valid_count:,}")
+    print(f"      ✓ Excluded samples: {excluded:,} ({excluded/total_count*100 if total_count else 0:.1f}%)")
+    
+    if valid_count == 0:
+        raise AnalysisError("No valid samples found after filtering!")
+    
+    # Analyze switching efficiency
+    print("\n[3/5] Analyzing switching efficiency...")
+    report = analyze_report(filtered_data)
+    switching = report['switching'] if counters is None else analyze_switching_efficiency(filtered_data, counters)
+    print_switching_results(switching)
+    if counters is not None:
+        print_summary_results(analyze_summaries(counters))
+    
+    # Analyze operating regions
+    print("\n[4/5] Analyzing operating regions...")
+    print_region_results(report['regions'])
+    
+    # Analyze load response
+    print_load_results(report['load_response'])
+    
+    # Sessions (firmware resets or parameter changes) within the capture
+    if len(session_slices(filtered_data)) > 1:
+        sessions = scan_sessions(log_file) if blocks is None else blocks['sessions']
+        print_session_results(sessions, analyze_sessions(filtered_data))
+    
+    # Record-based switching above is aliased (one record per 100ms);
+    # bursts count every control step
+    if bursts:
+        print_burst_results(bursts, *analyze_bursts(bursts))
+    if events:
+        print_event_results(events)
+    if timing is not None:
+        print_timing_results(timing)
     
     # Create visualizations
-    print("\n[5/5] Generating visualizations...")
-    output_file = log_file.replace('.txt', '_analysis.png')
-    create_visualizations(filtered_data, output_file)
+    if plot:
+        print("\n[5/5] Generating visualizations...")
+        output_file = output_stem(log_file) + '_analysis.png'
+        create_visualizations(filtered_data, output_file, timing)
     
     print("\n" + "="*80)
     print("ANALYSIS COMPLETE")
@@ -349,11 +2404,191 @@ def main():
     print("   The GEP algorithm reduced unnecessary switching by eliminating")
     print(f"   {switching['traditional_switches'] - switching['switch_count']:,} gate transitions")
     print("   while maintaining voltage regulation under dynamic load conditions.")
+    if 'pwm_pulses' in switching:
+        print(f"   At the gate, {switching['pwm_periods'] - switching['pwm_pulses']:,} of {switching['pwm_periods']:,} PWM pulses"
+              f" ({switching['pulse_reduction_percent']:.2f}%) were never emitted.")
     print("   ")
     print("   This demonstrates entropy-based control naturally optimizes switching")
     print("   frequency without explicit PWM optimization algorithms.")
     print("\n" + "="*80)
     print()
+    
+    return _batch_row(total_count, valid_count, switching, report['regions'])
+
+# Suffix of the per-file report written next to each log in batch mode
+REPORT_SUFFIX = '_report.txt'
+
+def expand_log_paths(patterns):
+    """
+    Expand files, directories and glob patterns into a sorted list of logs.
+
+    Directories are searched recursively for *.txt captures and their
+    compressed archives; report files written by a previous batch run are
+    skipped.
+    """
+    
+    paths = []
+    for pattern in patterns:
+        if Path(pattern).is_dir():
+            candidates = (path for path in Path(pattern).rglob('*') if is_log_file(path))
+        elif glob.has_magic(pattern):
+            candidates = map(Path, glob.glob(pattern, recursive=True))
+        else:
+            candidates = [Path(pattern)]
+        paths.extend(path for path in candidates if not path.name.endswith(REPORT_SUFFIX))
+    
+    return sorted(set(paths))
+
+def analyze_log_file(log_file, use_cache=True, plot=True, sample_range=None, session=None, rle=False):
+    """
+    Batch worker: analyze one log and write its report next to it.
+
+    Writes <log>_report.txt (the report main() prints, via
+    analyze_capture(), with the same --range/--session/--rle selection)
+    and, when plot is set, <log>_analysis.png. Returns one summary-table
+    row.
+    """
+    
+    start = time.perf_counter()
+    log_file = str(log_file)
+    report_file = output_stem(log_file) + REPORT_SUFFIX
+    with open(report_file, 'w', encoding='utf-8') as f, contextlib.redirect_stdout(f):
+        print(f"ERPC analysis report: {log_file}")
+        try:
+            row = analyze_capture(log_file, use_cache, sample_range, session, rle, plot, workers=1)
+        except AnalysisError as error:
+            print(f"\nERROR: {error}")
+            raise
+    
+    return {'file': log_file, **row, 'report_file': report_file, 'seconds': time.perf_counter() - start}
+
+def run_batch(log_files, jobs=None, use_cache=True, plot=True, summary_csv=None,
+              sample_range=None, session=None, rle=False):
+    """
+    Analyze many logs concurrently and print one consolidated summary table.
+
+    sample_range, session and rle apply to every log, as in a single run.
+    """
+    
+    print(f"\nAnalyzing {len(log_files):,} log files with {jobs or os.cpu_count()} workers...")
+    start = time.perf_counter()
+    rows = {}
+    
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(analyze_log_file, path, use_cache, plot, sample_range, session, rle): str(path)
+                   for path in log_files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                rows[path] = future.result()
+                print(f"  ✓ {path}  ({rows[path]['seconds']:.1f}s)")
+            except Exception as error:
+                rows[path] = {'file': path, 'error': str(error)}
+                print(f"  ✗ {path}: {error}")
+    
+    ordered = [rows[str(path)] for path in log_files]
+    width = max(len(row['file']) for row in ordered)
+    
+    print("\n" + "="*80)
+    print("BATCH SUMMARY")
+    print("="*80)
+    print(f"{'File':<{width}}  {'Samples':>10}  {'Valid':>10}  {'Switches':>9}  {'Reduction':>9}  {'Gate ON':>7}")
+    for row in ordered:
+        if 'error' in row:
+            print(f"{row['file']:<{width}}  ERROR: {row['error']}")
+            continue
+        print(f"{row['file']:<{width}}  {row['total_samples']:>10,}  {row['valid_samples']:>10,}"
+              f"  {row['switch_count']:>9,}  {row['reduction_percent']:>8.2f}%  {row['gate_on_time']:>6.1f}%")
+    print(f"\nWall time: {time.perf_counter() - start:.1f}s")
+    
+    if summary_csv:
+        fields = ['file', 'total_samples', 'valid_samples', 'switch_count', 'reduction_percent',
+                  'gate_on_time', 'nominal_samples', 'report_file', 'seconds', 'error']
+        with open(summary_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(ordered)
+        print(f"✓ Summary table saved to: {summary_csv}")
+    
+    return ordered
+
+def parse_sample_range(text):
+    """argparse type for START:END, where either side may be empty"""
+    
+    start, sep, end = text.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected START:END, got {text!r}")
+    try:
+        return (int(start) if start else None, int(end) if end else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected integer sample numbers, got {text!r}")
+
+def main():
+    print("="*80)
+    print("ERPC DATA ANALYSIS")
+    print("Entropy-Regulated Power Control - Arduino Implementation")
+    print("Guided Entropy Principle (GEP) Framework")
+    print("Lumiea Systems Research Division / ThunderStruck Service LLC")
+    print("="*80)
+    
+    # Check command line arguments
+    parser = argparse.ArgumentParser(description="Analyze an ERPC serial log.")
+    parser.add_argument('log_files', nargs='*', metavar='log_file',
+                        help="ERPC log file(s); directories and glob patterns run a batch")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"always re-parse the log instead of using {CACHE_DIR}")
+    parser.add_argument('--range', type=parse_sample_range, metavar='START:END',
+                        help="only analyze Samples START..END (inclusive; either end may be omitted); "
+                             "logs with several sessions also need --session")
+    parser.add_argument('--session', type=int, nargs='+', metavar='N',
+                        help="only analyze these session numbers (see the session table)")
+    parser.add_argument('--rle', action='store_true',
+                        help="analyze run-length encoded state runs instead of individual records")
+    parser.add_argument('--follow', action='store_true',
+                        help="keep reading the log as it grows and refresh the metrics")
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help="seconds between refreshes in --follow mode (default: 2)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes for batch runs (default: all cores)")
+    parser.add_argument('--no-plot', action='store_true',
+                        help="skip the per-file plots in batch runs")
+    parser.add_argument('--summary', metavar='CSV',
+                        help="also write the batch summary table to this CSV file")
+    args = parser.parse_args()
+    
+    batch = len(args.log_files) > 1 or any(Path(p).is_dir() or glob.has_magic(p) for p in args.log_files)
+    if batch and not args.follow:
+        log_files = expand_log_paths(args.log_files)
+        if not log_files:
+            print("\nERROR: No log files matched!")
+            sys.exit(1)
+        run_batch(log_files, args.jobs, use_cache=not args.no_cache, plot=not args.no_plot,
+                  summary_csv=args.summary, sample_range=args.range, session=args.session, rle=args.rle)
+        return
+    
+    if not args.log_files:
+        print("\nUsage: python3 erpc_complete_analysis.py <logfile.txt>")
+        print("\nAttempting to use 'erpc_log.txt' in current directory...")
+        log_file = 'erpc_log.txt'
+    else:
+        log_file = args.log_files[0]
+    
+    # Check if file exists
+    if not Path(log_file).exists():
+        print(f"\nERROR: Log file '{log_file}' not found!")
+        print("\nPlease provide the ERPC log file as an argument.")
+        sys.exit(1)
+    
+    if args.follow:
+        follow_log(log_file, args.interval)
+        return
+    
+    try:
+        analyze_capture(log_file, use_cache=not args.no_cache, sample_range=args.range,
+                        session=args.session, rle=args.rle)
+    except AnalysisError as error:
+        print(f"\nERROR: {error}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()